@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator
+
+from src.document import Document
+
+
+class BatchImporter:
+    """Import many sources, one `Document` per source.
+
+    Directories are expanded to the files matching `extensions`. While the
+    current document is processed the next `prefetch` ones are imported in a
+    background thread, so the import overlaps the (mostly I/O bound) transmute.
+    """
+
+    DEFAULT_PREFETCH: int = 1
+
+    def __init__(
+        self,
+        load_document: Callable[[Path], Document],
+        extensions: tuple[str, ...] | None = None,
+        prefetch: int | None = None,
+    ):
+        self.load_document = load_document
+        self.extensions = extensions
+        self.prefetch = self.DEFAULT_PREFETCH if prefetch is None else prefetch
+        if not isinstance(self.prefetch, int) or self.prefetch < 0:
+            raise ValueError(f"Bad prefetch value: {self.prefetch}")
+
+    def expand_sources(self, sources: list[Path]) -> list[Path]:
+        expanded = []
+        for source in sources:
+            if not source.is_dir():
+                expanded.append(source)
+                continue
+            expanded.extend(
+                file
+                for file in sorted(source.rglob("*"))
+                if file.is_file() and self.is_supported(file)
+            )
+        return expanded
+
+    def is_supported(self, file: Path) -> bool:
+        return not self.extensions or file.suffix.lower() in self.extensions
+
+    def iter_documents(self, sources: list[Path]) -> Iterator[tuple[Path, Document]]:
+        pending = deque(self.expand_sources(sources))
+        if not self.prefetch:
+            for source in pending:
+                yield source, self.load_document(source)
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            loading: deque[tuple[Path, Future]] = deque()
+            while pending or loading:
+                while pending and len(loading) <= self.prefetch:
+                    source = pending.popleft()
+                    loading.append(
+                        (source, executor.submit(self.load_document, source))
+                    )
+                source, future = loading.popleft()
+                yield source, future.result()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+
+
+class TranslationCheckpoint:
+    """Per-section translation progress stored as json to resume interrupted runs.
+
+    Each finished string is stored with its source text under its section name and
+    its index in the section, so it is only reapplied if the source still matches.
+    """
+
+    DEFAULT_INTERVAL: int = 50
+
+    def __init__(self, path: str | Path, interval: int | None = None):
+        self.path = Path(path)
+        self.interval = interval or self.DEFAULT_INTERVAL
+        self.sections: dict[str, dict[str, list[str]]] = {}
+        self.titles: dict[str, list[str]] = {}
+        self.unsaved = 0
+
+    def load(self) -> None:
+        if not self.path.is_file():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            raise IOError(f"Could not read checkpoint at '{self.path}'")
+        self.sections = data.get("sections", {})
+        self.titles = data.get("titles", {})
+
+    def get(self, section_name: str, index: int, source: str) -> str | None:
+        entry = self.sections.get(section_name, {}).get(str(index))
+        if entry and entry[0] == source:
+            return entry[1]
+
+    def record(
+        self, section_name: str, index: int, source: str, translation: str
+    ) -> None:
+        self.sections.setdefault(section_name, {})[str(index)] = [source, translation]
+        self.mark_unsaved()
+
+    def get_title(self, section_name: str, source: str) -> str | None:
+        entry = self.titles.get(section_name)
+        if entry and entry[0] == source:
+            return entry[1]
+
+    def record_title(self, section_name: str, source: str, translation: str) -> None:
+        self.titles[section_name] = [source, translation]
+        self.mark_unsaved()
+
+    def mark_unsaved(self) -> None:
+        self.unsaved += 1
+        if self.unsaved >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        data = {"sections": self.sections, "titles": self.titles}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.path)
+        self.unsaved = 0
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self.sections = {}
+        self.titles = {}
+        self.unsaved = 0
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from collections import deque
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit of the in-flight requests driven by the observed latency.
+
+    Every `window` finished requests the median latency of the round is compared
+    against the best median seen so far (the baseline). While it stays within
+    `tolerance` times the baseline and the error rate is under `max_error_rate`
+    the limit grows by one. Otherwise it is multiplied by `backoff`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        minimum: int = 1,
+        maximum: int = 16,
+        window: int = 10,
+        tolerance: float = 1.5,
+        backoff: float = 0.5,
+        max_error_rate: float = 0.1,
+    ):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(
+                f"Bad concurrency limits: {minimum} <= {initial} <= {maximum}"
+            )
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.max_error_rate = max_error_rate
+
+        self.baseline: float | None = None
+        self.in_flight = 0
+        self.latencies: deque[float] = deque(maxlen=100)
+        self.round_latencies: list[float] = []
+        self.round_errors = 0
+        self.available: asyncio.Condition | None = None
+
+    def connect(self) -> "AdaptiveConcurrencyLimiter":
+        """Bind to the running event loop"""
+        self.available = asyncio.Condition()
+        self.in_flight = 0
+        return self
+
+    async def acquire(self) -> None:
+        async with self.available:
+            await self.available.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency: float, failed: bool = False) -> None:
+        async with self.available:
+            self.in_flight -= 1
+            self.record(latency, failed)
+            self.available.notify_all()
+
+    def record(self, latency: float, failed: bool = False) -> None:
+        self.latencies.append(latency)
+        self.round_latencies.append(latency)
+        self.round_errors += failed
+        if len(self.round_latencies) >= self.window:
+            self.adjust()
+
+    def adjust(self) -> None:
+        median = self.get_percentile(self.round_latencies, 50)
+        error_rate = self.round_errors / len(self.round_latencies)
+        self.round_latencies = []
+        self.round_errors = 0
+
+        if self.baseline is None or median < self.baseline:
+            self.baseline = median
+
+        congested = median > self.baseline * self.tolerance
+        if congested or error_rate > self.max_error_rate:
+            self.limit = max(self.minimum, int(self.limit * self.backoff))
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+        self.report()
+
+    def get_percentile(self, values: list[float] | deque[float], percent: int) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, len(ordered) * percent // 100)
+        return ordered[index]
+
+    def report(self) -> None:
+        p50, p90, p99 = (self.get_percentile(self.latencies, p) for p in (50, 90, 99))
+        print(
+            f"Concurrency: {self.limit} | "
+            f"latency p50 {p50:.2f}s, p90 {p90:.2f}s, p99 {p99:.2f}s"
+        )
@@ -25,14 +25,20 @@ class ScriptoriumConfiguration:
     }
 
     def __init__(self) -> None:
+        self.clear_cache: bool = False
+        self.document_cache: dict | None = None
         self.exporter: ExporterHandler | None = None
         self.exporter_opts: dict | None = None
         self.importer: ImporterHandler | None = None
         self.importer_opts: dict | None = None
         self.input_file: list[Path] | None = None
+        self.no_cache: bool = False
         self.output: Path | None = None
+        self.prefetch: int | None = None
         self.raw_opts: dict | None = None
+        self.resume: bool = False
         self.selected_sections: list[Path] | None = None
+        self.selection_filters: dict | None = None
         self.transmuter: list[TransmuterHandler] | None = None
         self.transmuter_opts: dict | None = None
         self.transmuter_type: TransmuterWithModel | None = None
@@ -103,7 +109,22 @@ class ScriptoriumConfiguration:
         if transmuter_opts:
             self.transmuter_opts = transmuter_opts
 
+        self.resume = bool(opts.get("resume", False))
+
+        document_cache = opts.get("document_cache")
+        if isinstance(document_cache, (str, Path)):
+            document_cache = {"path": document_cache}
+        if document_cache:
+            self.document_cache = document_cache
+        self.no_cache = bool(opts.get("no_cache", False))
+        self.clear_cache = bool(opts.get("clear_cache", False))
+        self.prefetch = opts.get("prefetch")
+
         selected_sections = opts.get("selection")
+        if isinstance(selected_sections, dict):
+            selection = selected_sections.copy()
+            selected_sections = selection.pop("sections", ["*"])
+            self.selection_filters = selection or None
         if selected_sections:
             self.selected_sections = [Path(section) for section in selected_sections]
 
@@ -220,6 +241,11 @@ class ScriptoriumConfiguration:
     def get_importer_opts(self) -> dict | None:
         return self.importer_opts
 
+    def get_document_cache_opts(self) -> dict | None:
+        if self.no_cache:
+            return None
+        return self.document_cache
+
     def get_transmuter_opts(self) -> dict | None:
         # TODO: Review this approach, maybe do it in the parse function
         if self.exporter is None and self.exporter_opts:
@@ -228,3 +254,6 @@ class ScriptoriumConfiguration:
 
     def get_selected_sections(self) -> dict | None:
         return self.selected_sections
+
+    def get_selection_filters(self) -> dict | None:
+        return self.selection_filters
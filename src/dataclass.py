@@ -1,23 +1,168 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from sys import getsizeof
+from typing import ClassVar
 
 from bs4 import BeautifulSoup
 
+from src.lxml_content import LxmlContent
 
-@dataclass
+type SectionContent = BeautifulSoup | LxmlContent
+
+
+@dataclass(init=False, slots=True)
 class Section:
-    content: BeautifulSoup
+    """A document section. When built from `raw` markup the content tree is only
+    parsed on the first access. Only one copy of the content is kept: the raw
+    markup or the tree, plus the text extracted from them once requested.
+
+    `backend` picks the tree: "bs4" (BeautifulSoup) or "lxml" (`LxmlContent`).
+    `raw` and `text` can be memoryviews of a mapped document file (utf-8), see
+    `DocumentSerializer`. They are only decoded when used.
+    """
+
+    BACKENDS: ClassVar[tuple[str, ...]] = ("bs4", "lxml")
+
     title: str
     filepath: Path
     lang: str
     order: int
-    text: str | None = None
+    raw: str | memoryview | None
+    features: str | None
+    backend: str
+    _content: SectionContent | None = field(repr=False, compare=False)
+    _text: str | memoryview | None = field(repr=False, compare=False)
 
+    def __init__(
+        self,
+        content: SectionContent | None = None,
+        title: str = "",
+        filepath: Path | None = None,
+        lang: str = "",
+        order: int = 0,
+        text: str | memoryview | None = None,
+        raw: str | memoryview | None = None,
+        features: str | None = None,
+        backend: str = "bs4",
+    ):
+        if content is None and raw is None:
+            raise ValueError("Section needs a content or raw markup")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown section backend: {backend}")
+        self._content = content
+        self._text = text
+        self.title = title
+        self.filepath = filepath
+        self.lang = lang
+        self.order = order
+        self.raw = raw
+        self.features = features
+        self.backend = backend
 
-@dataclass
+    @staticmethod
+    def parse_markup(
+        raw: str | memoryview, features: str | None, backend: str
+    ) -> SectionContent:
+        if isinstance(raw, memoryview):
+            raw = str(raw, "utf-8")
+        if backend == "lxml":
+            return LxmlContent(raw, features)
+        return BeautifulSoup(raw, features)
+
+    @property
+    def content(self) -> SectionContent:
+        if self._content is None:
+            self._content = self.parse_markup(self.raw, self.features, self.backend)
+            self.raw = None
+        return self._content
+
+    @content.setter
+    def content(self, content: SectionContent) -> None:
+        self._content = content
+        self.raw = None
+
+    @property
+    def text(self) -> str | None:
+        if isinstance(self._text, memoryview):
+            self._text = str(self._text, "utf-8")
+        if self._text is None:
+            content = self._content
+            if content is None:
+                # Don't keep a whole tree around only to read its text
+                content = self.parse_markup(self.raw, self.features, self.backend)
+            self._text = content.get_text(separator="\n")
+        return self._text
+
+    @text.setter
+    def text(self, text: str | None) -> None:
+        self._text = text
+
+    @property
+    def parsed(self) -> bool:
+        return self._content is not None
+
+    @property
+    def has_text(self) -> bool:
+        """The text is already known, so reading it doesn't parse anything"""
+        return self._text is not None
+
+    @property
+    def markup(self) -> str:
+        """Serialized content: the raw markup as is, or the tree if parsed"""
+        if self._content is not None:
+            return str(self._content)
+        if isinstance(self.raw, memoryview):
+            return str(self.raw, "utf-8")
+        return self.raw
+
+    def get_features(self) -> str | None:
+        if not self.features and isinstance(self._content, BeautifulSoup):
+            return self._content.builder.NAME
+        return self.features
+
+    def memory_usage(self) -> dict[str, int]:
+        """Approximate bytes held by the section, by component"""
+        return {
+            "section": getsizeof(self) + getsizeof(self.title),
+            "raw": getsizeof(self.raw) if self.raw is not None else 0,
+            "text": getsizeof(self._text) if self._text is not None else 0,
+            "tree": self.get_tree_size(),
+        }
+
+    def get_tree_size(self) -> int:
+        content = self._content
+        if content is None:
+            return 0
+        if isinstance(content, LxmlContent):
+            return content.get_size()
+
+        size = getsizeof(content) + getsizeof(content.__dict__)
+        for node in content.descendants:
+            size += getsizeof(node) + getsizeof(node.__dict__)
+            attrs = getattr(node, "attrs", None)
+            if attrs:
+                size += getsizeof(attrs)
+        return size
+
+    def __getstate__(self) -> dict:
+        """Pickle the markup instead of the content tree"""
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["raw"] = self.markup
+        state["features"] = self.get_features()
+        state["_content"] = None
+        if isinstance(self._text, memoryview):
+            state["_text"] = self.text
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+@dataclass(slots=True)
 class DocumentMetadata:
     title: str
     creator: str
@@ -26,3 +171,23 @@ class DocumentMetadata:
     source: Path | None = None
     spine: list[Path] | None = None
     toc: list[tuple[str, str]] | None = None
+
+
+@dataclass
+class TranslationStats:
+    requests: int = 0
+    failed_attempts: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    batch_requests: int = 0
+    batch_fallbacks: int = 0
+    deduplicated: int = 0
+    restored: int = 0
+    aborted_streams: int = 0
+    capped: int = 0
+    timeouts: int = 0
+    warmup_time: float = 0.0
+    request_time: float = 0.0
+    escalations: int = 0
+    tier_paragraphs: dict[str, int] = field(default_factory=dict)
+    tier_time: dict[str, float] = field(default_factory=dict)
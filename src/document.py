@@ -1,33 +1,188 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Mapping
+from fnmatch import fnmatchcase
 from pathlib import Path
+from sys import getsizeof
 
 from src.dataclass import DocumentMetadata, Section
 
 
+class SectionsView(Mapping[str, Section]):
+    """Read-only selection of the sections of a document. Only the names are
+    stored, the sections are shared with the document."""
+
+    __slots__ = ("names", "sections")
+
+    def __init__(self, sections: Mapping[str, Section], names: Iterable[str]):
+        self.sections = sections
+        self.names = dict.fromkeys(names)
+
+    def __getitem__(self, name: str) -> Section:
+        if name not in self.names:
+            raise KeyError(name)
+        return self.sections[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+
 class Document:
+    """Metadata plus the sections by name. The sections are also indexed by their
+    in-zip path and by their order, to look them up and to select them.
+    `select*` return views: documents that share the sections (and the cached
+    serializations) of this one, without copying them."""
+
+    __slots__ = (
+        "metadata",
+        "orders",
+        "ordered_names",
+        "paths",
+        "sections",
+        "serialized",
+        "source",
+    )
+
     def __init__(self):
         self.metadata: DocumentMetadata | None = None
-        self.sections: dict[str, Section] | None = None
+        self.sections: dict[str, Section] | SectionsView | None = None
+        self.serialized: dict[tuple[str, bool, bool], str] = {}
         self.source: Path | None = None
+        # Indexes, built on the first use
+        self.orders: list[int] | None = None
+        self.ordered_names: list[str] | None = None
+        self.paths: dict[str, str] | None = None
+
+    def build_indexes(self) -> None:
+        by_order = sorted(self.sections.items(), key=lambda item: item[1].order)
+        self.ordered_names = [name for name, _ in by_order]
+        self.orders = [section.order for _, section in by_order]
+        self.paths = {
+            section.filepath.as_posix(): name
+            for name, section in self.sections.items()
+            if isinstance(section.filepath, Path)
+        }
+
+    def get_section_name(self, section_name: str | Path) -> str:
+        """Resolve a section name, in-zip path or filename to the section name"""
+        if not isinstance(section_name, Path):
+            return section_name
+        if self.paths is None:
+            self.build_indexes()
+        return self.paths.get(section_name.as_posix(), section_name.name)
 
     def get_section(self, section_name: str | Path) -> Section:
-        if isinstance(section_name, Path):
-            section_name = section_name.name
-        return self.sections.get(section_name)
+        return self.sections.get(self.get_section_name(section_name))
+
+    def get_section_by_order(self, order: int) -> Section | None:
+        names = self.get_names_in_range(order, order)
+        return self.sections[names[0]] if names else None
 
-    def get_content(self, section_name: str | Path, raw: bool = False) -> str:
-        if isinstance(section_name, Path):
-            section_name = section_name.name
+    def get_names_in_range(self, start: int, stop: int | None = None) -> list[str]:
+        """Names of the sections with `start <= order <= stop`, in order"""
+        if self.orders is None:
+            self.build_indexes()
+        first = bisect_left(self.orders, start)
+        last = len(self.orders) if stop is None else bisect_right(self.orders, stop)
+        return self.ordered_names[first:last]
+
+    def get_names_matching(self, pattern: str) -> list[str]:
+        """Names of the sections whose name or in-zip path match the glob"""
+        if self.ordered_names is None:
+            self.build_indexes()
+        matching = set(name for name in self.sections if fnmatchcase(name, pattern))
+        matching.update(
+            name for path, name in self.paths.items() if fnmatchcase(path, pattern)
+        )
+        return [name for name in self.ordered_names if name in matching]
+
+    def select(self, section_names: Iterable[str | Path]) -> "Document":
+        names = [self.get_section_name(name) for name in section_names]
+        missing = [name for name in names if name not in self.sections]
+        if missing:
+            raise KeyError(f"Missing sections from the document: {missing}")
+        return self.make_view(names)
+
+    def select_range(self, start: int, stop: int | None = None) -> "Document":
+        return self.make_view(self.get_names_in_range(start, stop))
+
+    def select_glob(self, pattern: str) -> "Document":
+        return self.make_view(self.get_names_matching(pattern))
+
+    def make_view(self, names: Iterable[str]) -> "Document":
+        sections = self.sections
+        if isinstance(sections, SectionsView):
+            sections = sections.sections
+
+        view = Document()
+        view.metadata = self.metadata
+        view.source = self.source
+        view.serialized = self.serialized
+        view.sections = SectionsView(sections, names)
+        return view
+
+    def get_content(
+        self, section_name: str | Path, raw: bool = False, pretty: bool = False
+    ) -> str:
+        """Serialized markup (compact unless `pretty`) or text with `raw`.
+
+        The result is cached until the section is marked as modified. The markup
+        of a section that was never parsed is its raw source, as is.
+        """
+        section_name = self.get_section_name(section_name)
         section = self.sections.get(section_name)
         if not section:
             raise KeyError(f"Missing section from the document: {section_name}")
 
+        key = (section_name, raw, pretty)
+        if key in self.serialized:
+            return self.serialized[key]
+
         if raw:
-            return section.content.get_text("\n")
+            content = section.text
+        elif pretty:
+            content = section.content.prettify()
         else:
-            return section.content.prettify()
+            content = section.markup
+        self.serialized[key] = content
+        return content
+
+    def mark_modified(self, section_name: str) -> None:
+        """Drop the cached serializations after a change of the section content"""
+        for key in [key for key in self.serialized if key[0] == section_name]:
+            del self.serialized[key]
+        section = self.sections.get(section_name)
+        if section:
+            section.text = None
+
+    def memory_usage(self) -> dict:
+        """Approximate bytes held by the document, by section and by component"""
+        sections = {}
+        components = {"section": 0, "raw": 0, "text": 0, "tree": 0, "serialized": 0}
+        for name, section in (self.sections or {}).items():
+            sections[name] = section.memory_usage()
+            for component, size in sections[name].items():
+                components[component] += size
+
+        for (name, raw, _), content in self.serialized.items():
+            # The text and the untouched markup are shared with the section
+            if name not in self.sections or raw or content is self.sections[name].raw:
+                continue
+            components["serialized"] += getsizeof(content)
+
+        return {
+            "sections": sections,
+            "components": components,
+            "total": sum(components.values()),
+        }
 
     def set_medatada(self, metadata: DocumentMetadata) -> None:
         self.validate_document_metadata(metadata)
@@ -37,6 +192,7 @@ class Document:
     def set_sections(self, sections: dict[str, Section]) -> None:
         self.validate_sections(sections)
         self.sections = sections
+        self.orders = self.ordered_names = self.paths = None
 
     def validate_sections(self, sections: dict[str, Section]) -> None:
         if not sections:
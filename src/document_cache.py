@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+from pathlib import Path
+
+from src.document import Document
+from src.document_serializer import DocumentSerializer
+from src.lru_store import SQLiteLRUStore
+from src.protocols import ImporterHandler
+
+
+class DocumentCache:
+    """On-disk store of imported documents backed by SQLite.
+
+    Entries are keyed by the content hash of the sources and the importer name,
+    `VERSION` and options. Documents are stored with `DocumentSerializer`, so
+    their sections are still parsed lazily after a cache read. When the stored
+    documents exceed `max_size` bytes the least recently used entries are
+    evicted. See `SQLiteLRUStore`.
+    """
+
+    DEFAULT_MAX_SIZE: int = 1024 * 1024 * 1024  # 1 GiB
+    READ_CHUNK_SIZE: int = 1024 * 1024
+
+    def __init__(self, path: str | Path, max_size: int | None = None):
+        self.serializer = DocumentSerializer()
+        # Batch imports read and write it from a background thread
+        self.store = SQLiteLRUStore(
+            path,
+            "documents",
+            "data",
+            "BLOB",
+            max_size or self.DEFAULT_MAX_SIZE,
+            check_same_thread=False,
+        )
+
+    def make_key(
+        self,
+        sources: list[Path],
+        importer: ImporterHandler,
+        importer_opts: dict | None = None,
+    ) -> str:
+        digest = hashlib.sha256()
+        importer_id = (
+            type(importer).__name__,
+            getattr(importer, "VERSION", ""),
+            json.dumps(importer_opts or {}, sort_keys=True, default=str),
+        )
+        digest.update("\0".join(importer_id).encode("utf-8"))
+        for source in sources:
+            digest.update(b"\0")
+            with open(source, "rb") as stream:
+                while chunk := stream.read(self.READ_CHUNK_SIZE):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Document | None:
+        data = self.store.get(key)
+        if data is None:
+            return None
+
+        try:
+            return self.serializer.decode(data)
+        except Exception:
+            # Stale entry from an incompatible version of the classes
+            self.store.delete(key)
+            return None
+
+    def set(self, key: str, document: Document) -> None:
+        data = self.serializer.encode(document)
+        self.store.set(key, data, len(data))
+
+    def flush(self) -> None:
+        self.store.flush()
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def close(self) -> None:
+        self.store.close()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import mmap
+import struct
+from pathlib import Path
+
+from src.dataclass import DocumentMetadata, Section
+from src.document import Document
+
+
+class DocumentSerializer:
+    """Compact binary format of a `Document`, to hand it to other processes or
+    to keep it between stages without importing the source again.
+
+    Layout: `HEADER` (magic, format version and json size), a json header with
+    the metadata and the section table, then the utf-8 markup and text of every
+    section back to back. The table keeps the (offset, size) of each blob, so
+    with `mmap` the sections just point into the mapped file until they are used.
+    """
+
+    EXTENSION: str = ".scrd"
+    HEADER: struct.Struct = struct.Struct("<4sHI")
+    MAGIC: bytes = b"SCRD"
+    VERSION: int = 1
+
+    def encode(self, document: Document) -> bytes:
+        blobs = []
+        offset = 0
+
+        def add_blob(text: str | None) -> list[int] | None:
+            nonlocal offset
+            if text is None:
+                return None
+            blob = text.encode("utf-8")
+            blobs.append(blob)
+            offset += len(blob)
+            return [offset - len(blob), len(blob)]
+
+        sections = []
+        for name, section in document.sections.items():
+            sections.append(
+                {
+                    "name": name,
+                    "title": section.title,
+                    "filepath": self.encode_paths(section.filepath),
+                    "lang": section.lang,
+                    "order": section.order,
+                    "features": section.get_features(),
+                    "backend": section.backend,
+                    "raw": add_blob(section.markup),
+                    "text": add_blob(section.text if section.has_text else None),
+                }
+            )
+
+        metadata = document.metadata
+        header = {
+            "metadata": {
+                "title": metadata.title,
+                "creator": metadata.creator,
+                "lang": metadata.lang,
+                "description": metadata.description,
+                "source": self.encode_paths(metadata.source),
+                "spine": self.encode_paths(metadata.spine),
+                "toc": metadata.toc,
+            },
+            "sections": sections,
+        }
+        raw_header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        prefix = self.HEADER.pack(self.MAGIC, self.VERSION, len(raw_header))
+        return b"".join([prefix, raw_header, *blobs])
+
+    def decode(self, data: bytes | memoryview) -> Document:
+        """Sections point to `data` when it's a memoryview (zero-copy)"""
+        magic, version, header_size = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC:
+            raise ValueError("Not a serialized document")
+        if version != self.VERSION:
+            raise ValueError(f"Unsupported document format version: {version}")
+
+        start = self.HEADER.size
+        header = json.loads(bytes(data[start : start + header_size]))
+        blobs_start = start + header_size
+
+        def get_blob(location: list[int] | None) -> str | memoryview | None:
+            if location is None:
+                return None
+            blob_offset, size = location
+            blob = data[blobs_start + blob_offset : blobs_start + blob_offset + size]
+            return blob if isinstance(blob, memoryview) else str(blob, "utf-8")
+
+        sections = {}
+        for entry in header["sections"]:
+            sections[entry["name"]] = Section(
+                title=entry["title"],
+                filepath=self.decode_paths(entry["filepath"]),
+                lang=entry["lang"],
+                order=entry["order"],
+                text=get_blob(entry["text"]),
+                raw=get_blob(entry["raw"]),
+                features=entry["features"],
+                backend=entry["backend"],
+            )
+
+        raw_metadata = header["metadata"]
+        toc = raw_metadata["toc"]
+        metadata = DocumentMetadata(
+            title=raw_metadata["title"],
+            creator=raw_metadata["creator"],
+            lang=raw_metadata["lang"],
+            description=raw_metadata["description"],
+            source=self.decode_paths(raw_metadata["source"]),
+            spine=self.decode_paths(raw_metadata["spine"]),
+            toc=[tuple(entry) for entry in toc] if toc is not None else None,
+        )
+
+        document = Document()
+        document.set_medatada(metadata)
+        document.set_sections(sections)
+        return document
+
+    def dump(self, document: Document, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(self.encode(document))
+        tmp_path.replace(path)
+        return path
+
+    def load(self, path: str | Path, use_mmap: bool = False) -> Document:
+        if not use_mmap:
+            return self.decode(Path(path).read_bytes())
+
+        with open(path, "rb") as stream:
+            # The mapping stays open while any section points into it
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.decode(memoryview(mapped))
+
+    def encode_paths(self, value: Path | list[Path] | None) -> str | list[str] | None:
+        if isinstance(value, (list, tuple)):
+            return [str(path) for path in value]
+        return str(value) if value is not None else None
+
+    def decode_paths(self, value: str | list[str] | None) -> Path | list[Path] | None:
+        if isinstance(value, list):
+            return [Path(path) for path in value]
+        return Path(value) if value is not None else None
@@ -12,12 +12,16 @@ from src.document import Document
 class EpubExporter:
     source: Path | None = None
     DEFAULT_OUTPUT_FILENAME: str = "output.epub"
+    EXTENSION: str = ".epub"
+    pretty: bool = False
 
     def __init__(self):
         self.tmp_prefix = "scriptorium-export-tmp_"
 
     def set_options(self, config) -> None:
-        if getattr(config, "output"):
+        if isinstance(config, dict):
+            self.pretty = bool(config.get("pretty", self.pretty))
+        elif getattr(config, "output"):
             self.output = config.output
 
     def export(self, document: Document, output: Path) -> None:
@@ -39,7 +43,7 @@ class EpubExporter:
 
     def update_epub_section_files(self, document: Document, tmp_dir: Path) -> None:
         for file, section in document.sections.items():
-            new_content = document.get_content(file)
+            new_content = document.get_content(file, pretty=self.pretty)
             target_path = tmp_dir / section.filepath
             try:
                 with open(target_path, "w", encoding="utf-8") as stream:
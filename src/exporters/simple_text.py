@@ -11,6 +11,8 @@ from src.document import Document
 class SimpleTextExporter:
     """ExporterHandler subscriptor"""
 
+    EXTENSION: str = ".txt"
+
     def set_options(self, config) -> None:
         pass
 
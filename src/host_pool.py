@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+import httpx
+from ollama import AsyncClient, ChatResponse, Client, ResponseError
+
+
+@dataclass
+class OllamaHost:
+    host: str
+    concurrency: int = 1
+    client: AsyncClient | None = None
+    in_flight: int = 0
+    completed: int = 0
+    failures: int = 0
+    unhealthy_until: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.concurrency
+
+
+class OllamaHostPool:
+    """Dispatch chat requests to the least-loaded healthy Ollama host.
+
+    It mimics the `AsyncClient.chat` signature so the translator can use it in
+    place of a single client. A host that fails to answer is taken out of the
+    rotation for `cooldown` seconds and the request is re-queued on another host.
+    """
+
+    DEFAULT_COOLDOWN: float = 30.0
+
+    def __init__(
+        self,
+        hosts: list[str | dict],
+        client_options: dict | None = None,
+        cooldown: float | None = None,
+    ):
+        if not hosts:
+            raise ValueError("Missing hosts")
+        self.hosts = [self.parse_host(host) for host in hosts]
+        self.client_options = client_options or {}
+        self.cooldown = cooldown if cooldown is not None else self.DEFAULT_COOLDOWN
+        self.available: asyncio.Condition | None = None
+
+    @property
+    def capacity(self) -> int:
+        return sum(host.concurrency for host in self.hosts)
+
+    def parse_host(self, host: str | dict) -> OllamaHost:
+        if isinstance(host, str):
+            return OllamaHost(host)
+        if not isinstance(host, dict) or not host.get("host"):
+            raise ValueError(f"Bad host entry: {host}")
+
+        concurrency = host.get("concurrency", 1)
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError(f"Bad concurrency value for {host['host']}: {concurrency}")
+        return OllamaHost(host["host"], concurrency)
+
+    def connect(self) -> "OllamaHostPool":
+        """Create the clients. Must be called inside the running event loop."""
+        self.available = asyncio.Condition()
+        for host in self.hosts:
+            limits = httpx.Limits(
+                max_connections=host.concurrency,
+                max_keepalive_connections=host.concurrency,
+            )
+            options = self.client_options | {"host": host.host, "limits": limits}
+            host.client = AsyncClient(**options)
+        return self
+
+    async def acquire(self) -> OllamaHost:
+        async with self.available:
+            while True:
+                host = self.get_least_loaded_host()
+                if host:
+                    host.in_flight += 1
+                    return host
+                if not any(host.healthy for host in self.hosts):
+                    raise ConnectionError("No healthy Ollama host available")
+                await self.available.wait()
+
+    async def release(self, host: OllamaHost, failed: bool = False) -> None:
+        async with self.available:
+            host.in_flight -= 1
+            if failed:
+                self.mark_failed(host)
+            else:
+                host.completed += 1
+            self.available.notify_all()
+
+    def mark_failed(self, host: OllamaHost) -> None:
+        host.failures += 1
+        host.unhealthy_until = time.monotonic() + self.cooldown
+
+    def check_hosts(self) -> OllamaHost:
+        """Ask every host for its models and put the silent ones on cooldown.
+        Returns the least-loaded healthy host. It runs out of the event loop."""
+        for host in self.hosts:
+            client = Client(**self.client_options | {"host": host.host})
+            try:
+                client.list()
+            except Exception as error:
+                if not self.is_host_failure(error):
+                    raise
+                self.mark_failed(host)
+            finally:
+                client._client.close()
+
+        healthy_host = self.get_least_loaded_host()
+        if healthy_host is None:
+            raise ConnectionError("No healthy Ollama host available")
+        return healthy_host
+
+    def get_least_loaded_host(self) -> OllamaHost | None:
+        candidates = [
+            host
+            for host in self.hosts
+            if host.healthy and host.in_flight < host.concurrency
+        ]
+        return min(candidates, key=lambda host: host.load, default=None)
+
+    def is_host_failure(self, error: Exception) -> bool:
+        # A slow answer is not a dead host, the request timeout covers it
+        if isinstance(error, httpx.TimeoutException):
+            return False
+        if isinstance(error, ResponseError):
+            return error.status_code >= 500
+        return isinstance(error, (ConnectionError, httpx.TransportError))
+
+    async def chat(self, stream: bool = False, **request: Any) -> Any:
+        if stream:
+            return self.stream_chat(request)
+
+        while True:
+            host = await self.acquire()
+            failed = False
+            try:
+                return await host.client.chat(**request)
+            except Exception as error:
+                failed = self.is_host_failure(error)
+                if not failed:
+                    raise
+            finally:
+                # Also on cancellation (e.g. `asyncio.timeout`), or the slot leaks
+                await self.release(host, failed=failed)
+
+    async def stream_chat(self, request: dict) -> AsyncIterator[ChatResponse]:
+        while True:
+            host = await self.acquire()
+            failed = started = False
+            stream = None
+            try:
+                stream = await host.client.chat(**request, stream=True)
+                async for chunk in stream:
+                    started = True
+                    yield chunk
+                return
+            except Exception as error:
+                failed = self.is_host_failure(error)
+                # Connection errors show up before the first chunk. After it,
+                # retrying on another host would repeat the received chunks.
+                if started or not failed:
+                    raise
+            finally:
+                if stream is not None:
+                    await stream.aclose()
+                await self.release(host, failed=failed)
+
+    async def close(self) -> None:
+        for host in self.hosts:
+            if host.client:
+                await host.client._client.aclose()
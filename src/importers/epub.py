@@ -1,31 +1,69 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from tempfile import TemporaryDirectory
+from urllib.parse import unquote
 from zipfile import ZipFile
 
 from bs4 import BeautifulSoup
 
 from src.dataclass import DocumentMetadata, Section
 from src.document import Document
+from src.sampling import ContentSampler
 
 
 class EpubImporter:
+    CONTAINER_FILE: str = "META-INF/container.xml"
+    EXTENSIONS: tuple[str, ...] = (".epub",)
+    HTML_LANG_PATTERN: re.Pattern = re.compile(
+        r"<html\b[^>]*?\bxml:lang\s*=\s*[\"']([^\"']*)[\"']"
+    )
+    TEXT_MEDIA_TYPES: set[str] = {"application/xhtml+xml", "text/html"}
+    TOC_MEDIA_TYPE: str = "application/x-dtbncx+xml"
+    VERSION: str = "3"  # Bump it when the generated document changes
+
     sources: list[Path] | None = None
 
     def __init__(self):
         self.text_files = None
         self.metadata_file = None
+        self.toc_file = None
         self.text_files_content = None
         self.metadata_file_content = None
+        self.toc_file_content = None
         self.parsed_sections = None
+        self.toc_index = None
+        self.toc_index_source = None
         self.temp_path = None
         self.sources = None
+        self.workers = 1
+        self.backend = "bs4"
+        self.lang_sampler: ContentSampler | None = None
 
     def set_options(self, options: dict) -> None:
-        raise NotImplementedError()
+        if not isinstance(options, dict):
+            raise TypeError("EpubImporter bad options type")
+
+        workers = options.get("workers", self.workers)
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError(f"Bad workers value: {workers}")
+        self.workers = workers
+
+        backend = options.get("backend", self.backend)
+        if backend not in Section.BACKENDS:
+            raise ValueError(f"Unknown section backend: {backend}")
+        self.backend = backend
+
+        if options.get("detect_lang"):
+            self.lang_sampler = ContentSampler(
+                options.get("sample_size"), options.get("samples")
+            )
+        elif "detect_lang" in options:
+            self.lang_sampler = None
 
     def load_data(self, sources: list[Path]) -> None:
         if len(sources) > 1:
@@ -38,11 +76,8 @@ class EpubImporter:
             raise TypeError(f"source should be a Path object: {type(source)}")
 
         self.sources = [source]
-        with TemporaryDirectory(prefix="scriptum_") as tmpdir:
-            tmp_path = Path(tmpdir)
-            self.extract_epub(source, tmp_path)
-            self.collect_metadata_and_text_files(tmp_path)
-            self.collect_files_data()
+        with ZipFile(source, "r") as stream:
+            self.collect_files_data_from_zip(stream)
 
     def generate_document(self) -> Document:
         document = Document()
@@ -51,34 +86,85 @@ class EpubImporter:
 
         document.set_medatada(metadata)
         document.set_sections(sections)
+        # The sections hold the only copy of the markup from now on
+        self.text_files_content = None
         return document
 
     def parse_sections(self, metadata: DocumentMetadata) -> dict[str, Section]:
+        """Build the sections without parsing them. See `Section.content`."""
+        if self.workers > 1:
+            return self.parse_sections_in_parallel(metadata)
+
         sections = {}
         for order, filepath in enumerate(metadata.spine):
             raw_data = self.text_files_content[filepath]
-
-            extension = filepath.suffix[1:]
-            if extension == "xhtml":
-                extension = "lxml-xml"
-            elif extension == "html":
-                extension = "lxml"
-            content = BeautifulSoup(raw_data, extension)
-
-            section_metadata = Section(
-                content=content,
-                title=self.get_section_title(filepath, metadata, content),
+            section = Section(
                 filepath=self.get_section_inzip_path(filepath),
-                lang=self.get_section_lang(content) or metadata.lang,
+                lang=self.get_section_lang_from_markup(raw_data)
+                or self.detect_section_lang(raw_data)
+                or metadata.lang,
                 order=order,
-                text=content.get_text(separator="\n"),
+                raw=raw_data,
+                features=self.get_parser_features(filepath),
+                backend=self.backend,
             )
-            sections[filepath.name] = section_metadata
+            section.title = self.get_section_title(filepath, metadata, section)
+            sections[filepath.name] = section
 
         self.parsed_sections = sections
         return sections
 
+    def parse_sections_in_parallel(
+        self, metadata: DocumentMetadata
+    ) -> dict[str, Section]:
+        """Parse the sections in a process pool. Workers only return picklable
+        (title, lang, text) tuples, so the trees are rebuilt on demand here."""
+        raw_data = [self.text_files_content[filepath] for filepath in metadata.spine]
+        features = [self.get_parser_features(filepath) for filepath in metadata.spine]
+        chunksize = max(1, len(raw_data) // (self.workers * 4))
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            parsed = executor.map(
+                parse_section_markup,
+                raw_data,
+                features,
+                repeat(self.lang_sampler),
+                repeat(self.backend),
+                chunksize=chunksize,
+            )
+
+            sections = {}
+            for order, (filepath, (title, lang, text)) in enumerate(
+                zip(metadata.spine, parsed)
+            ):
+                sections[filepath.name] = Section(
+                    title=self.get_toc_title(filepath, metadata)
+                    or title
+                    or filepath.stem,
+                    filepath=self.get_section_inzip_path(filepath),
+                    lang=lang or metadata.lang,
+                    order=order,
+                    text=text,
+                    raw=raw_data[order],
+                    features=features[order],
+                    backend=self.backend,
+                )
+
+        self.parsed_sections = sections
+        return sections
+
+    def get_parser_features(self, filepath: Path) -> str:
+        extension = filepath.suffix[1:]
+        if extension == "xhtml":
+            extension = "lxml-xml"
+        elif extension == "html":
+            extension = "lxml"
+        return extension
+
     def get_section_inzip_path(self, path: Path) -> Path:
+        if "OEBPS" not in path.parts:
+            # Loaded straight from the zip, so it's already the in-zip path
+            return path
         root_index = path.parts.index("OEBPS")
         inzip_path = Path(*path.parts[root_index:])
         return inzip_path
@@ -87,22 +173,51 @@ class EpubImporter:
         lang = content.html.get("xml:lang")
         return lang
 
-    def get_section_title(
-        self, filename: Path, metadata: DocumentMetadata, content: BeautifulSoup
-    ) -> str:
-        if metadata.toc:
-            for file, title in metadata.toc:
-                if filename.name not in file:
-                    continue
+    def get_section_lang_from_markup(self, markup: str) -> str | None:
+        match = self.HTML_LANG_PATTERN.search(markup)
+        return match.group(1) if match else None
 
-                if title:
-                    return title
-                else:
-                    break
+    def detect_section_lang(self, markup: str) -> str | None:
+        """Only with the `detect_lang` option, for sections without `xml:lang`"""
+        if self.lang_sampler is None:
+            return None
+        return self.lang_sampler.detect_markup_lang(markup)
 
+    def get_section_title(
+        self, filename: Path, metadata: DocumentMetadata, section: Section
+    ) -> str:
+        title = self.get_toc_title(filename, metadata)
+        if title:
+            return title
+
+        # Only the sections without a toc entry are parsed here. The tree is
+        # dropped afterwards, so the section still holds a single copy
+        content = (
+            section.content
+            if section.parsed
+            else section.parse_markup(section.raw, section.features, section.backend)
+        )
         title = self.get_section_title_from_content(content)
         return title or filename.stem
 
+    def get_toc_title(self, filename: Path, metadata: DocumentMetadata) -> str | None:
+        if not metadata.toc:
+            return None
+
+        # Built once per toc, so resolving every section stays linear
+        if self.toc_index_source is not metadata.toc:
+            self.toc_index = self.get_toc_index(metadata.toc)
+            self.toc_index_source = metadata.toc
+        return self.toc_index.get(filename.name) or None
+
+    def get_toc_index(self, toc: list[tuple[str, str]]) -> dict[str, str]:
+        """Map each toc file name (without `#fragment`) to its first title"""
+        index = {}
+        for href, title in toc:
+            filename = href.split("#", 1)[0].rsplit("/", 1)[-1]
+            index.setdefault(filename, title)
+        return index
+
     def get_section_title_from_content(self, content: BeautifulSoup) -> str:
         title = content.get("title", "")
 
@@ -154,22 +269,24 @@ class EpubImporter:
         ordered_section_files = []
         spine = [itemref["idref"] for itemref in soup.find_all("itemref")]
         manifest = {item["id"]: item["href"] for item in soup.find_all("item")}
+        text_files = self.get_text_files_index()
 
         # Cross-reference: The spine has the order, the manifest the actual file
         for section_name in spine:
             full_section_name = manifest.get(section_name, "")
             section_file = full_section_name.rsplit("/", 1)[-1]
-            if not section_file:
-                continue
-
-            # TODO: Refactor. An "inner for" each time?
-            for readed_file in self.text_files:
-                if readed_file.name == section_file:
-                    ordered_section_files.append(readed_file)
-                    break
+            if section_file in text_files:
+                ordered_section_files.append(text_files[section_file])
 
         return ordered_section_files
 
+    def get_text_files_index(self) -> dict[str, Path]:
+        """Map each text file name to its path. The first one wins on duplicates"""
+        index = {}
+        for text_file in self.text_files:
+            index.setdefault(text_file.name, text_file)
+        return index
+
     def get_text_from_soup_tag(self, tag: str, soup: BeautifulSoup) -> str | None:
         tag_element = soup.find(tag)
         if tag_element and hasattr(tag_element, "text"):
@@ -193,6 +310,47 @@ class EpubImporter:
             toc.append(entry)
         return toc
 
+    def collect_files_data_from_zip(self, stream: ZipFile) -> None:
+        """Read the metadata, toc and text files without extracting the epub"""
+        metadata_file = self.get_metadata_file_from_container(stream)
+        self.metadata_file_content = stream.read(metadata_file).decode("utf-8")
+
+        root = posixpath.dirname(metadata_file)
+        soup = BeautifulSoup(self.metadata_file_content, "xml")
+        text_files = []
+        toc_file = None
+        for item in soup.find_all("item"):
+            href = posixpath.normpath(
+                posixpath.join(root, unquote(item.get("href", "")))
+            )
+            media_type = item.get("media-type")
+            if media_type in self.TEXT_MEDIA_TYPES:
+                text_files.append(href)
+            elif media_type == self.TOC_MEDIA_TYPE:
+                toc_file = href
+
+        if toc_file is None:
+            raise ValueError("Missing toc.ncx")
+
+        self.metadata_file = Path(metadata_file)
+        self.toc_file = Path(toc_file)
+        self.toc_file_content = stream.read(toc_file).decode("utf-8")
+        self.text_files = [Path(file) for file in text_files]
+        self.text_files_content = {
+            Path(file): stream.read(file).decode("utf-8") for file in text_files
+        }
+
+    def get_metadata_file_from_container(self, stream: ZipFile) -> str:
+        try:
+            container = stream.read(self.CONTAINER_FILE)
+        except KeyError:
+            raise ValueError(f"Missing {self.CONTAINER_FILE}")
+
+        rootfile = BeautifulSoup(container, "xml").find("rootfile")
+        if not rootfile or not rootfile.get("full-path"):
+            raise ValueError("Missing content.opf")
+        return rootfile["full-path"]
+
     def collect_files_data(self) -> None:
         if self.metadata_file is None or self.text_files is None:
             raise ValueError("Not collected files. Try load_data() first.")
@@ -241,3 +399,20 @@ class EpubImporter:
         self.temp_path = target_path
         with ZipFile(source, "r") as stream:
             stream.extractall(target_path)
+
+
+def parse_section_markup(
+    raw_data: str,
+    features: str,
+    lang_sampler: ContentSampler | None = None,
+    backend: str = "bs4",
+) -> tuple[str, str | None, str]:
+    """Process pool worker. Returns the (title, lang, text) of a section markup."""
+    importer = EpubImporter()
+    content = Section.parse_markup(raw_data, features, backend)
+    title = importer.get_section_title_from_content(content)
+    text = content.get_text(separator="\n")
+    lang = importer.get_section_lang(content) if content.html else None
+    if not lang and lang_sampler:
+        lang = lang_sampler.detect_lang(text)
+    return title, lang, text
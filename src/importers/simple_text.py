@@ -2,26 +2,75 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+from html import escape
 from pathlib import Path
+from typing import Iterator
 
-import chardet
 from bs4 import BeautifulSoup
-from langdetect import detect as langdetect
 
 from src.dataclass import DocumentMetadata, Section
 from src.document import Document
+from src.sampling import ContentSampler
 
 
 class SimpleTextImporter:
     """ImporterHandler subscriptor.
 
     It infers the title and author by the filename: `<author> - <title>.<ext>`
+
+    With the `stream` option the file is read line by line and split into
+    sections on runs of `split_blank_lines` blank lines, on paragraph first
+    lines matching `split_pattern` (chapter headings) or once
+    `max_section_size` chars are collected. Sections keep only their markup and are parsed lazily.
     """
 
+    DEFAULT_MAX_SECTION_SIZE: int = 64 * 1024
+    DEFAULT_SPLIT_PATTERN: str = r"^(chapter|cap[ií]tulo)\s+[\divxlcdm]+\b.{0,60}$"
+    EXTENSIONS: tuple[str, ...] = (".txt",)
+    VERSION: str = "4"  # Bump it when the generated document changes
+
     def __init__(self):
         self.sources: list[Path] = None
         self.content: list[str] = []
+        self.encoding: str | None = None
         self.metadata: list[DocumentMetadata] | None = None
+        self.backend = "bs4"
+        self.sampler = ContentSampler()
+        self.stream = False
+        self.max_section_size = self.DEFAULT_MAX_SECTION_SIZE
+        self.split_blank_lines = 0
+        self.split_pattern = re.compile(self.DEFAULT_SPLIT_PATTERN, re.IGNORECASE)
+
+    def set_options(self, options: dict) -> None:
+        if not isinstance(options, dict):
+            raise TypeError("SimpleTextImporter bad options type")
+
+        self.stream = bool(options.get("stream", self.stream))
+
+        backend = options.get("backend", self.backend)
+        if backend not in Section.BACKENDS:
+            raise ValueError(f"Unknown section backend: {backend}")
+        self.backend = backend
+
+        max_section_size = options.get("max_section_size", self.max_section_size)
+        if not isinstance(max_section_size, int) or max_section_size < 1:
+            raise ValueError(f"Bad max_section_size value: {max_section_size}")
+        self.max_section_size = max_section_size
+
+        split_blank_lines = options.get("split_blank_lines", self.split_blank_lines)
+        if not isinstance(split_blank_lines, int) or split_blank_lines < 0:
+            raise ValueError(f"Bad split_blank_lines value: {split_blank_lines}")
+        self.split_blank_lines = split_blank_lines
+
+        self.sampler = ContentSampler(
+            options.get("sample_size", self.sampler.sample_size),
+            options.get("samples", self.sampler.samples),
+        )
+
+        if "split_pattern" in options:
+            pattern = options["split_pattern"]
+            self.split_pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
 
     # TODO: add support for dirs
     def load_data(self, sources: Path | list[Path]) -> None:
@@ -34,8 +83,12 @@ class SimpleTextImporter:
             raise NotImplementedError("Not implemented support for multiple files")
         for source in sources:
             try:
-                encoding = self.detect_encoding(source)
-                content = source.read_text(encoding=encoding)
+                self.encoding = self.detect_encoding(source)
+                if self.stream:
+                    # Only a sample, for the language detection
+                    content = self.sampler.read_text_sample(source, self.encoding)
+                else:
+                    content = self.read_text(source)
                 self.content.append(content)
             except Exception as e:
                 raise Exception(f"Error reading the file {source}: \n{e}")
@@ -44,6 +97,8 @@ class SimpleTextImporter:
     def generate_document(self) -> Document:
         if not self.content:
             raise ValueError("Empty content. Try load_data() first.")
+        if self.stream:
+            return self.generate_streamed_document()
 
         document = Document()
         metadata = self.build_metadata()
@@ -52,6 +107,8 @@ class SimpleTextImporter:
         document.set_medatada(metadata)
         # TODO: Add functionality to handle multiple files
         document.set_sections(sections)
+        # The section soup is now the only copy of the content
+        self.content = []
         return document
 
     def build_metadata(self) -> DocumentMetadata:
@@ -100,12 +157,93 @@ class SimpleTextImporter:
             filepath=self.sources,
             lang=self.metadata.lang,
             order=1,
-            text=self.content,
         )
 
         # TODO: Add support for multiple sources files
         return {self.sources[0].name: section}
 
+    def generate_streamed_document(self) -> Document:
+        document = Document()
+        metadata = self.build_metadata()
+        self.content = []
+
+        source = self.sources[0]
+        sections = {
+            f"{source.stem}_{section.order:04}{source.suffix}": section
+            for section in self.iter_sections(source)
+        }
+        document.set_medatada(metadata)
+        document.set_sections(sections)
+        return document
+
+    def iter_sections(self, source: Path) -> Iterator[Section]:
+        """Read the source line by line and yield its sections as they fill up"""
+        paragraphs: list[str] = []
+        partial_paragraph: list[str] = []
+        partial_size = size = blank_lines = 0
+        title = None
+        order = 1
+        starts_paragraph = True
+
+        # The encoding comes from samples and the sections already yielded can't
+        # be read again: a stray byte out of the samples is replaced, not fatal
+        with open(source, "r", encoding=self.encoding, errors="replace") as stream:
+            for raw_line in stream:
+                line = raw_line.strip()
+                # A hard-wrapped line may start with "chapter" too
+                is_heading = bool(
+                    line
+                    and starts_paragraph
+                    and self.split_pattern
+                    and self.split_pattern.match(line)
+                )
+                starts_paragraph = not line
+                ends_paragraph = not line or is_heading
+                ends_paragraph |= partial_size >= self.max_section_size
+                if ends_paragraph and partial_paragraph:
+                    paragraphs.append(" ".join(partial_paragraph))
+                    size += partial_size
+                    partial_paragraph = []
+                    partial_size = 0
+
+                blank_lines = 0 if line else blank_lines + 1
+                ends_section = is_heading or size >= self.max_section_size
+                if self.split_blank_lines:
+                    ends_section |= blank_lines >= self.split_blank_lines
+                if ends_section and paragraphs:
+                    yield self.make_section(paragraphs, title, order)
+                    paragraphs = []
+                    size = 0
+                    title = None
+                    order += 1
+
+                if is_heading:
+                    title = line
+                    paragraphs.append(line)
+                    size += len(line)
+                elif line:
+                    partial_paragraph.append(line)
+                    partial_size += len(line) + 1
+
+        if partial_paragraph:
+            paragraphs.append(" ".join(partial_paragraph))
+        if paragraphs:
+            yield self.make_section(paragraphs, title, order)
+
+    def make_section(
+        self, paragraphs: list[str], title: str | None, order: int
+    ) -> Section:
+        body = "".join(f"<p>{escape(paragraph)}</p>" for paragraph in paragraphs)
+        return Section(
+            title=title or f"{self.metadata.title} ({order})",
+            filepath=self.sources[0],
+            lang=self.metadata.lang,
+            order=order,
+            raw=f"<html><body>{body}</body></html>",
+            features="html.parser",
+            backend=self.backend,
+        )
+
     def make_html_soup(self) -> BeautifulSoup:
         soup = BeautifulSoup(features="html.parser")
         html = soup.new_tag("html")
@@ -139,8 +277,8 @@ class SimpleTextImporter:
         if not content:
             raise ValueError("Missing content. Try load_data first")
 
-        detected = langdetect(content)
-        if detected != "unknown":
+        detected = self.sampler.detect_lang(content)
+        if detected:
             return detected
 
         return self.get_system_lang()
@@ -161,12 +299,12 @@ class SimpleTextImporter:
         return system_lang or failback
 
     def detect_encoding(self, source: Path) -> str:
-        default = "utf-8"
-        with open(source, "rb") as stream:
-            detector = chardet.universaldetector.UniversalDetector()
-            for line in stream:
-                detector.feed(line)
-                if detector.done:
-                    break
-            detector.close()
-        return detector.result.get("encoding", default).lower()
+        return self.sampler.detect_encoding(source)
+
+    def read_text(self, source: Path) -> str:
+        try:
+            return source.read_text(encoding=self.encoding)
+        except UnicodeDecodeError:
+            # Invalid bytes between the samples used to detect the encoding
+            self.encoding = self.sampler.detect_full_encoding(source)
+            return source.read_text(encoding=self.encoding)
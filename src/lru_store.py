@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import time
+from pathlib import Path
+
+
+class SQLiteLRUStore:
+    """SQLite table of keyed values with a size limit.
+
+    When the stored values exceed `max_size` bytes the least recently used
+    entries are evicted. The use time of the hits is kept in memory and written
+    in batches, so reading doesn't open a write transaction. The pending hits
+    are written every `FLUSH_HITS` hits, before an eviction and on `close()`.
+    """
+
+    FLUSH_HITS: int = 1000
+
+    def __init__(
+        self,
+        path: str | Path,
+        table: str,
+        value_column: str,
+        value_type: str,
+        max_size: int,
+        check_same_thread: bool = True,
+    ):
+        self.path = Path(path)
+        self.table = table
+        self.value_column = value_column
+        self.value_type = value_type  # TEXT or BLOB
+        self.max_size = max_size
+        self.check_same_thread = check_same_thread
+        self.connection: sqlite3.Connection | None = None
+        self.hits: dict[str, float] = {}
+        self.size = 0
+        self.open()
+
+    def open(self) -> None:
+        if self.connection is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(
+            self.path, check_same_thread=self.check_same_thread
+        )
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f"key TEXT PRIMARY KEY, {self.value_column} {self.value_type} NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_last_used "
+            f"ON {self.table} (last_used)"
+        )
+        self.connection.commit()
+        self.size = self.get_stored_size()
+
+    def get(self, key: str) -> str | bytes | None:
+        row = self.connection.execute(
+            f"SELECT {self.value_column} FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self.hits[key] = time.time()
+        if len(self.hits) >= self.FLUSH_HITS:
+            self.flush()
+        return row[0]
+
+    def flush(self) -> None:
+        """Write the use time of the hits"""
+        if not self.hits:
+            return
+        self.connection.executemany(
+            f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self.hits.items()],
+        )
+        self.connection.commit()
+        self.hits = {}
+
+    def set(self, key: str, value: str | bytes, size: int) -> None:
+        previous = self.connection.execute(
+            f"SELECT size FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if previous:
+            self.size -= previous[0]
+
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+            (key, value, size, time.time()),
+        )
+        self.hits.pop(key, None)
+        self.size += size
+        if self.size > self.max_size:
+            self.evict()
+        self.connection.commit()
+
+    def delete(self, key: str) -> None:
+        self.hits.pop(key, None)
+        self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        self.connection.commit()
+        self.size = self.get_stored_size()
+
+    def evict(self) -> None:
+        self.flush()
+        rows = self.connection.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY last_used ASC"
+        )
+        evicted = []
+        for key, size in rows:
+            if self.size <= self.max_size:
+                break
+            evicted.append((key,))
+            self.size -= size
+        self.connection.executemany(f"DELETE FROM {self.table} WHERE key = ?", evicted)
+
+    def get_stored_size(self) -> int:
+        row = self.connection.execute(f"SELECT SUM(size) FROM {self.table}").fetchone()
+        return row[0] or 0
+
+    def clear(self) -> None:
+        self.hits = {}
+        self.connection.execute(f"DELETE FROM {self.table}")
+        self.connection.commit()
+        self.size = 0
+
+    def close(self) -> None:
+        if self.connection is None:
+            return
+        self.flush()
+        self.connection.close()
+        self.connection = None
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from lxml import etree
+from lxml import html as lxml_html
+
+LIBXML2_NODE_SIZE: int = 120  # xmlNode struct on 64-bit builds
+XML_NAMESPACE: str = "{http://www.w3.org/XML/1998/namespace}"
+XML_FEATURES: set[str] = {"lxml-xml", "xml"}
+
+
+class LxmlString:
+    """Text of an element without children. Mimics `bs4.NavigableString` usage"""
+
+    __slots__ = ("element",)
+
+    def __init__(self, element: etree._Element):
+        self.element = element
+
+    def __str__(self) -> str:
+        return self.element.text or ""
+
+    def replace_with(self, text: str) -> None:
+        self.element.text = text
+
+
+class LxmlTag:
+    """Thin wrapper of an lxml element with the BeautifulSoup `Tag` methods used
+    by the importers, the translator and the exporters."""
+
+    __slots__ = ("element", "owner")
+
+    def __init__(self, element: etree._Element, owner: "LxmlContent"):
+        self.element = element
+        self.owner = owner
+
+    def __getattr__(self, name: str) -> "LxmlTag | None":
+        # `tag.body`, `tag.html`... as in BeautifulSoup
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.find(name)
+
+    @property
+    def name(self) -> str:
+        return etree.QName(self.element).localname
+
+    @property
+    def string(self) -> LxmlString | None:
+        """The only string inside the tag, if any. Same rules as BeautifulSoup"""
+        element = self.element
+        while True:
+            children = list(element)
+            if not children:
+                return self.owner.get_string(element) if element.text else None
+            if len(children) > 1 or element.text or children[0].tail:
+                return None
+            element = children[0]
+            if not isinstance(element.tag, str):
+                return None
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        if key.startswith("xml:"):
+            key = XML_NAMESPACE + key[4:]
+        return self.element.get(key, default)
+
+    def find(self, name: str, attrs: dict | None = None) -> "LxmlTag | None":
+        return next(iter(self.find_all(name, attrs)), None)
+
+    def find_all(
+        self, names: str | list[str], attrs: dict | None = None
+    ) -> list["LxmlTag"]:
+        names = [names] if isinstance(names, str) else names
+        tags = [f"{{*}}{name}" for name in names]
+        found = []
+        for element in self.element.iter(*tags):
+            if element is self.element:
+                continue
+            if attrs and any(element.get(k) != v for k, v in attrs.items()):
+                continue
+            found.append(LxmlTag(element, self.owner))
+        return found
+
+    def get_text(self, separator: str = "") -> str:
+        return separator.join(self.element.itertext())
+
+
+class LxmlContent(LxmlTag):
+    """Section content parsed straight with `lxml.etree`/`lxml.html`.
+
+    A lighter alternative to the BeautifulSoup tree with the same subset of its
+    API: text extraction, `find_all` of translatable tags, `string.replace_with`
+    and serialization with `prettify`/`str`.
+    """
+
+    __slots__ = ("features", "strings")
+
+    def __init__(self, markup: str | bytes, features: str | None = None):
+        self.features = features or "lxml"
+        self.strings: dict[etree._Element, LxmlString] = {}
+        if isinstance(markup, str):
+            markup = markup.encode("utf-8")
+
+        if self.is_xml:
+            parser = etree.XMLParser(recover=True, huge_tree=True)
+            root = etree.fromstring(markup, parser)
+        else:
+            root = lxml_html.document_fromstring(markup)
+        super().__init__(root, self)
+
+    @property
+    def is_xml(self) -> bool:
+        return self.features in XML_FEATURES
+
+    def get_string(self, element: etree._Element) -> LxmlString:
+        # Same element, same object. The translator dedups strings by `id`
+        if element not in self.strings:
+            self.strings[element] = LxmlString(element)
+        return self.strings[element]
+
+    def find_all(
+        self, names: str | list[str], attrs: dict | None = None
+    ) -> list[LxmlTag]:
+        root = LxmlTag(self.element, self)
+        names = [names] if isinstance(names, str) else names
+        found = [root] if root.name in names and not attrs else []
+        return found + root.find_all(names, attrs)
+
+    def get_size(self) -> int:
+        """Approximate bytes of the libxml2 tree"""
+        size = 0
+        for element in self.element.iter():
+            size += LIBXML2_NODE_SIZE + len(element.attrib) * LIBXML2_NODE_SIZE
+            size += len(element.text or "") + len(element.tail or "")
+        return size
+
+    def prettify(self) -> str:
+        tree = self.element.getroottree()
+        if not self.is_xml:
+            return lxml_html.tostring(tree, pretty_print=True, encoding="unicode")
+        serialized = etree.tostring(tree, pretty_print=True, encoding="unicode")
+        return '<?xml version="1.0" encoding="utf-8"?>\n' + serialized
+
+    def __str__(self) -> str:
+        tree = self.element.getroottree()
+        if not self.is_xml:
+            return lxml_html.tostring(tree, encoding="unicode")
+        return etree.tostring(tree, encoding="unicode")
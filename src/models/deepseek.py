@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-
+import re
 from typing import Any
 
 from src.protocols import TransmuterType
+from src.stream_validator import ReasoningStreamValidator, StreamValidator
 
 
 class ModelDeepseek:
@@ -18,8 +19,23 @@ class ModelDeepseek:
         "Any extra text, beyond the translated text, would result in a poor response:"
     )
     bad_chars_tolerance: int = 2
-    valid_utf = ()
+    valid_utf = (
+        (0x0020, 0x024F),  # Basic to extended Latin (without control chars)
+        (0x2010, 0x205E),  # General Punctuation (dashes, quotes, ellipsis)
+    )
+    chatty_preambles: tuple[str, ...] = (
+        "here is",
+        "here's",
+        "sure,",
+        "sure!",
+        "certainly",
+        "the translation",
+        "translation:",
+    )
+    batch_budget: int = 3000  # leave room for the reasoning
+    reasoning_tokens: int = 2048  # the <think> block also counts for num_predict
     tag: str = "deepseek-r1"
+    think_pattern: re.Pattern = re.compile(r"<think>.*?(?:</think>|$)", re.S)
 
     def __init__(self, id: str | None = None, instruction: str | None = None):
         self.id = id if id else self.id
@@ -27,31 +43,39 @@ class ModelDeepseek:
 
     def prepare_request(self, opts: dict) -> Any:
         content = opts.get("content")
-        return {
+        instruction = opts.get("instruction", self.instruction)
+        request = {
             "model": self.id,
             "messages": [
-                {"role": "system", "content": self.instruction},
+                {"role": "system", "content": instruction},
                 {"role": "user", "content": content},
             ],
         }
 
+        max_tokens = opts.get("max_tokens")
+        if max_tokens:
+            request["options"] = {"num_predict": max_tokens}
+        return request
+
+    def clean_response(self, response: str) -> str:
+        """Remove the `<think>` reasoning that precedes the answer"""
+        return self.think_pattern.sub("", response).strip()
+
+    def make_stream_validator(self, original: str) -> ReasoningStreamValidator:
+        validator = StreamValidator(
+            original, self.valid_utf, self.bad_chars_tolerance, self.chatty_preambles
+        )
+        return ReasoningStreamValidator(validator)
+
+    def partial_response_validator(self, partial: str, original: str) -> bool:
+        """Check an incomplete streamed response. False if it's already invalid."""
+        return self.make_stream_validator(original).feed(partial)
+
     def response_validator(self, response: str | None, original: str) -> bool:
         if response is None:
             return False
-        if "  " in response and "  " not in original:
+        response = self.clean_response(response)
+        if not response:
             return False
-        if "\n" in response and "\n" not in original:
-            return False
-
-        consecutive_bad_chars = 0
-        for char in response:
-            if char == " ":
-                continue
-            val = ord(char)
-            if any(left <= val <= right for left, right in self.valid_utf):
-                consecutive_bad_chars = 0
-            else:
-                consecutive_bad_chars += 1
-            if consecutive_bad_chars == self.bad_chars_tolerance:
-                return False
-        return True
+        validator = StreamValidator(original, self.valid_utf, self.bad_chars_tolerance)
+        return validator.feed(response)
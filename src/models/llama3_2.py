@@ -17,6 +17,7 @@ class ModelLlama3_2:
         ", such as introductory statements, clarifications, questions, doubts, "
         "or any text not directly translating the given content:"
     )
+    batch_budget: int = 1500  # small context window
     tag: str = "llama3.2"
 
     def __init__(self, id: str | None = None, instruction: str | None = None):
@@ -27,12 +28,18 @@ class ModelLlama3_2:
 
     def prepare_request(self, opts: dict) -> Any:
         content = opts.get("content")
-        return {
+        instruction = opts.get("instruction", self.instruction)
+        request = {
             "model": self.id,
             "messages": [
-                {"role": "system", "content": self.instruction},
+                {"role": "system", "content": instruction},
                 {"role": "user", "content": content},
             ],
         }
 
+        max_tokens = opts.get("max_tokens")
+        if max_tokens:
+            request["options"] = {"num_predict": max_tokens}
+        return request
+
     response_validator = None
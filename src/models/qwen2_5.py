@@ -5,6 +5,7 @@
 from typing import Any
 
 from src.protocols import TransmuterType
+from src.stream_validator import StreamValidator
 
 
 class ModelQwen:
@@ -26,6 +27,16 @@ class ModelQwen:
         (0x1F300, 0x1F9FF),  # Emojis and Miscellaneous Symbols
         (0x2654, 0x265F),  # Chess Pieces
     )
+    chatty_preambles: tuple[str, ...] = (
+        "here is",
+        "here's",
+        "sure,",
+        "sure!",
+        "certainly",
+        "the translation",
+        "translation:",
+    )
+    batch_budget: int = 6000  # chars per batched request
     tag: str = "qwen2.5"
 
     def __init__(self, id: str | None = None, instruction: str | None = None):
@@ -34,31 +45,31 @@ class ModelQwen:
 
     def prepare_request(self, opts: dict) -> Any:
         content = opts.get("content")
-        return {
+        instruction = opts.get("instruction", self.instruction)
+        request = {
             "model": self.id,
             "messages": [
-                {"role": "system", "content": self.instruction},
+                {"role": "system", "content": instruction},
                 {"role": "user", "content": content},
             ],
         }
 
+        max_tokens = opts.get("max_tokens")
+        if max_tokens:
+            request["options"] = {"num_predict": max_tokens}
+        return request
+
+    def make_stream_validator(self, original: str) -> StreamValidator:
+        return StreamValidator(
+            original, self.valid_utf, self.bad_chars_tolerance, self.chatty_preambles
+        )
+
+    def partial_response_validator(self, partial: str, original: str) -> bool:
+        """Check an incomplete streamed response. False if it's already invalid."""
+        return self.make_stream_validator(original).feed(partial)
+
     def response_validator(self, response: str | None, original: str) -> bool:
         if response is None:
             return False
-        if "  " in response and "  " not in original:
-            return False
-        if "\n" in response and "\n" not in original:
-            return False
-
-        consecutive_bad_chars = 0
-        for char in response:
-            if char == " ":
-                continue
-            val = ord(char)
-            if any(left <= val <= right for left, right in self.valid_utf):
-                consecutive_bad_chars = 0
-            else:
-                consecutive_bad_chars += 1
-            if consecutive_bad_chars == self.bad_chars_tolerance:
-                return False
-        return True
+        validator = StreamValidator(original, self.valid_utf, self.bad_chars_tolerance)
+        return validator.feed(response)
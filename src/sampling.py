@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from chardet import UniversalDetector
+from langdetect import DetectorFactory, LangDetectException
+from langdetect import detect as langdetect
+
+# Same input, same language. langdetect is random otherwise
+DetectorFactory.seed = 0
+
+
+class ContentSampler:
+    """Bounded samples of a file or a text for the encoding and lang detectors.
+
+    It takes the first `sample_size` bytes (or chars) plus `samples` evenly
+    spaced ones through the rest, so the cost doesn't grow with the input size.
+    """
+
+    DEFAULT_SAMPLE_SIZE: int = 16 * 1024
+    DEFAULT_SAMPLES: int = 4
+    TAG_PATTERN: re.Pattern = re.compile(r"<[^>]*>")
+
+    def __init__(self, sample_size: int | None = None, samples: int | None = None):
+        self.sample_size = sample_size or self.DEFAULT_SAMPLE_SIZE
+        self.samples = self.DEFAULT_SAMPLES if samples is None else samples
+        if not isinstance(self.sample_size, int) or self.sample_size < 1:
+            raise ValueError(f"Bad sample_size value: {self.sample_size}")
+        if not isinstance(self.samples, int) or self.samples < 0:
+            raise ValueError(f"Bad samples value: {self.samples}")
+
+    def get_offsets(self, size: int) -> list[int]:
+        if size <= self.sample_size * (self.samples + 1):
+            return [0]
+        # The last sample ends at the end of the input
+        last = size - self.sample_size
+        return [0] + [last * i // self.samples for i in range(1, self.samples + 1)]
+
+    def read_samples(self, source: Path) -> list[bytes]:
+        size = source.stat().st_size
+        offsets = self.get_offsets(size)
+        with open(source, "rb") as stream:
+            if offsets == [0]:
+                return [stream.read()]
+
+            chunks = []
+            for offset in offsets:
+                stream.seek(offset)
+                chunks.append(stream.read(self.sample_size))
+        return chunks
+
+    def sample_text(self, text: str) -> str:
+        offsets = self.get_offsets(len(text))
+        if offsets == [0]:
+            return text
+        return "\n".join(text[offset : offset + self.sample_size] for offset in offsets)
+
+    def is_utf8(self, chunks: list[bytes]) -> bool:
+        """Valid utf-8, ignoring the multibyte chars cut at the sample edges"""
+        for index, chunk in enumerate(chunks):
+            if index:
+                # Skip up to 3 continuation bytes (0b10xxxxxx) of a cut char
+                skip = 0
+                while skip < min(3, len(chunk)) and chunk[skip] & 0xC0 == 0x80:
+                    skip += 1
+                chunk = chunk[skip:]
+            try:
+                chunk.decode("utf-8")
+            except UnicodeDecodeError as error:
+                cut_at_the_end = error.reason == "unexpected end of data"
+                if not (cut_at_the_end and index < len(chunks) - 1):
+                    return False
+        return True
+
+    def detect_encoding(self, source: Path, default: str = "utf-8") -> str:
+        """Guess from the samples. The utf-8 fast path can miss invalid bytes
+        between them: on a decode error use `detect_full_encoding`."""
+        chunks = self.read_samples(source)
+        if self.is_utf8(chunks):
+            return "utf-8"
+        return self.run_detector(chunks, default)
+
+    def detect_full_encoding(self, source: Path, default: str = "utf-8") -> str:
+        """Run the detector through the non-ascii chunks of the whole file. The
+        ascii ones tell nothing and the detector may give up on them as ascii."""
+
+        def read_chunks() -> Iterator[bytes]:
+            with open(source, "rb") as stream:
+                while chunk := stream.read(self.sample_size):
+                    if not chunk.isascii():
+                        yield chunk
+
+        return self.run_detector(read_chunks(), default)
+
+    def run_detector(self, chunks: Iterable[bytes], default: str) -> str:
+        detector = UniversalDetector()
+        for chunk in chunks:
+            detector.feed(chunk)
+            if detector.done:
+                break
+        detector.close()
+        return (detector.result.get("encoding") or default).lower()
+
+    def read_text_sample(self, source: Path, encoding: str) -> str:
+        chunks = self.read_samples(source)
+        return "\n".join(chunk.decode(encoding, errors="ignore") for chunk in chunks)
+
+    def detect_lang(self, text: str) -> str | None:
+        try:
+            detected = langdetect(self.sample_text(text))
+        except LangDetectException:
+            return None
+        return detected if detected != "unknown" else None
+
+    def detect_markup_lang(self, markup: str) -> str | None:
+        """Detect the language of the markup text without parsing it"""
+        return self.detect_lang(self.TAG_PATTERN.sub(" ", markup))
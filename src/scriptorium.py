@@ -1,19 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
 from pathlib import Path
+from typing import Iterator
 
+from src.batch_importer import BatchImporter
 from src.configuration import ScriptoriumConfiguration
 from src.document import Document
+from src.document_cache import DocumentCache
+from src.document_serializer import DocumentSerializer
 from src.protocols import ExporterHandler, ImporterHandler, TransmuterHandler
 from src.selectors import DocumentSectionSelector
 
 
 class Scriptorium:
+    CHECKPOINT_SUFFIX: str = ".checkpoint.json"
     DEFAULT_OUTPUT_PATH: str = "output"
 
     def __init__(self):
         self.document: Document | None = None
+        self.document_cache: DocumentCache | None = None
         self.exporter: ExporterHandler | None = None
         self.importer: ImporterHandler | None = None
         self.input_files: list[Path] | None = None
@@ -25,6 +32,7 @@ class Scriptorium:
         self.options.setup(opts)
         self.set_handlers()
         self.set_handlers_options()
+        self.set_document_cache()
 
     def set_handlers(self) -> None:
         self.set_importer()
@@ -43,10 +51,25 @@ class Scriptorium:
         if exporter_opts and self.exporter:
             self.exporter.set_options(exporter_opts)
 
-        transmuter_opts = self.options.get_transmuter_opts()
+        transmuter_opts = self.resolve_checkpoint_opts(
+            self.options.get_transmuter_opts()
+        )
         if transmuter_opts:
             self.transmuter.set_options(transmuter_opts)
 
+    def resolve_checkpoint_opts(self, opts: dict | None) -> dict | None:
+        """Point `checkpoint: true` next to the output and enable it to resume"""
+        if self.options.resume:
+            opts = (opts or {}) | {"resume": True}
+            opts.setdefault("checkpoint", True)
+        if opts and opts.get("checkpoint") is True:
+            opts = opts | {"checkpoint": self.get_checkpoint_path()}
+        return opts
+
+    def get_checkpoint_path(self) -> Path:
+        output = self.output or Path(self.DEFAULT_OUTPUT_PATH)
+        return output.with_name(output.name + self.CHECKPOINT_SUFFIX)
+
     def set_importer(self, importer: ImporterHandler | None = None) -> None:
         self.importer = importer or self.options.importer
 
@@ -56,11 +79,142 @@ class Scriptorium:
     def set_exporter(self, exporter: ExporterHandler | None = None) -> None:
         self.exporter = exporter or self.options.exporter
 
+    def set_document_cache(self, cache: DocumentCache | None = None) -> None:
+        cache_opts = self.options.get_document_cache_opts()
+        if cache is None and cache_opts:
+            cache = DocumentCache(cache_opts["path"], cache_opts.get("max_size"))
+        self.document_cache = cache
+        if cache and self.options.clear_cache:
+            cache.clear()
+
+    def flush_document_cache(self) -> None:
+        """Write the use time of the cache hits, kept in memory until now"""
+        if self.document_cache:
+            self.document_cache.flush()
+
+    def make_importer(self) -> ImporterHandler:
+        """Fresh instance of the configured importer. Importers keep state"""
+        importer = type(self.importer)()
+        importer_opts = self.options.get_importer_opts()
+        if importer_opts:
+            importer.set_options(importer_opts)
+        return importer
+
     def load_data(self) -> Document:
-        self.importer.load_data(self.input_files)
-        self.document = self.importer.generate_document()
+        self.document = self.import_document(self.input_files, self.importer)
+        self.flush_document_cache()
+        return self.document
+
+    def load_document(self, source: Path) -> Document:
+        return self.import_document([source], self.make_importer())
+
+    def import_document(
+        self, sources: list[Path], importer: ImporterHandler
+    ) -> Document:
+        cache_key = None
+        if self.document_cache:
+            cache_key = self.document_cache.make_key(
+                sources, importer, self.options.get_importer_opts()
+            )
+            document = self.document_cache.get(cache_key)
+            if document:
+                return document
+
+        importer.load_data(sources)
+        document = importer.generate_document()
+        if cache_key:
+            self.document_cache.set(cache_key, document)
+        return document
+
+    def save_document(self, path: Path | None = None) -> Path:
+        """Keep the current document for a later stage. See `restore_document`"""
+        return DocumentSerializer().dump(
+            self.document, path or self.get_document_path()
+        )
+
+    def restore_document(
+        self, path: Path | None = None, use_mmap: bool = False
+    ) -> Document:
+        path = path or self.get_document_path()
+        self.document = DocumentSerializer().load(path, use_mmap)
         return self.document
 
+    def get_document_path(self) -> Path:
+        output = self.output or Path(self.DEFAULT_OUTPUT_PATH)
+        return output.with_name(output.name + DocumentSerializer.EXTENSION)
+
+    def iter_documents(
+        self, sources: list[Path] | None = None
+    ) -> Iterator[tuple[Path, Document]]:
+        """Yield (source, document) for every input file or file in an input dir"""
+        return self.make_batch_importer().iter_documents(sources or self.input_files)
+
+    def make_batch_importer(self) -> BatchImporter:
+        return BatchImporter(
+            self.load_document,
+            getattr(self.importer, "EXTENSIONS", None),
+            self.options.prefetch,
+        )
+
+    def process_all(self) -> list[Path]:
+        """Import, transmute and export every source into the output directory"""
+        sources = self.make_batch_importer().expand_sources(self.input_files)
+        outputs = self.get_document_outputs(sources)
+        start = time.perf_counter()
+        try:
+            for (_, document), output in zip(self.iter_documents(sources), outputs):
+                self.document = document
+                self.set_document_checkpoint(output)
+                self.transmute(document)
+                output.parent.mkdir(parents=True, exist_ok=True)
+                self.transmuter.export(output)
+        finally:
+            self.flush_document_cache()
+
+        self.report_batch(len(outputs), time.perf_counter() - start)
+        return outputs
+
+    def get_document_outputs(self, sources: list[Path]) -> list[Path]:
+        outputs = {}
+        for source in sources:
+            output = self.get_document_output(source)
+            if output in outputs:
+                raise FileExistsError(
+                    f"Both '{outputs[output]}' and '{source}' export to '{output}'"
+                )
+            outputs[output] = source
+        return list(outputs)
+
+    def get_document_output(self, source: Path) -> Path:
+        """Same relative path as the source inside its input dir, if any"""
+        output = self.output or Path(self.DEFAULT_OUTPUT_PATH)
+        extension = getattr(self.exporter, "EXTENSION", None) or source.suffix
+        relative = Path(source.name)
+        for input_path in self.input_files or []:
+            if input_path.is_dir() and source.is_relative_to(input_path):
+                relative = source.relative_to(input_path)
+                break
+        return output / relative.with_name(relative.stem + extension)
+
+    def set_document_checkpoint(self, output: Path) -> None:
+        """Each document of a batch gets its own checkpoint, next to its output"""
+        checkpoint = getattr(self.transmuter, "checkpoint", None)
+        if checkpoint is None:
+            return
+        opts = self.resolve_checkpoint_opts(self.options.get_transmuter_opts()) or {}
+        self.transmuter.set_checkpoint(
+            output.with_name(output.name + self.CHECKPOINT_SUFFIX),
+            checkpoint.interval,
+            opts.get("resume", False),
+        )
+
+    def report_batch(self, documents: int, elapsed: float) -> None:
+        per_hour = documents * 3600 / elapsed if elapsed else 0.0
+        print(
+            f"Processed {documents} documents in {elapsed:.2f}s "
+            f"({per_hour:.0f} documents/hour)"
+        )
+
     def transmute(self, document: Document | None = None) -> None:
         document = document if document else self.document
         selection = DocumentSectionSelector().select(document, self.options)
@@ -1,15 +1,48 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from copy import copy
+import re
 from pathlib import Path
 
 from src.configuration import ScriptoriumConfiguration
+from src.dataclass import Section
 from src.document import Document
+from src.sampling import ContentSampler
 
 
 class DocumentSectionSelector:
+    """Select the sections to transmute. Besides names and in-zip paths, the
+    selection accepts glob patterns (`Text/chapter*`) and order ranges (`3-10`).
+
+    The selected sections can be narrowed down by filters, to skip the covers,
+    indexes, separators, etc. before they cost any transmutation time:
+
+    - `min_length`: minimum text length of the section.
+    - `include`/`exclude`: regex searched in the section title or filename.
+    - `skip_lang`: skip the sections already in this language.
+
+    The filters only look at the markup (or the text if already known) and a
+    bounded sample of it, so no section is parsed to filter it.
+    """
+
+    FILTERS: tuple[str, ...] = ("exclude", "include", "min_length", "skip_lang")
+    GLOB_CHARS: str = "*?["
+    HEAD_PATTERN: re.Pattern = re.compile(r"<head\b.*?</head\s*>", re.I | re.S)
+    RANGE_PATTERN: re.Pattern = re.compile(r"^(\d+)-(\d*)$")
+
+    def __init__(self):
+        self.lang_sampler: ContentSampler | None = None
+
     def select(self, document: Document, opts: ScriptoriumConfiguration) -> Document:
+        selection = self.select_sections(document, opts)
+        filters = opts.get_selection_filters()
+        if filters:
+            return self.filter_sections(selection, filters)
+        return selection
+
+    def select_sections(
+        self, document: Document, opts: ScriptoriumConfiguration
+    ) -> Document:
         if len(document.sections) == 1:
             return document
         preselection = opts.get_selected_sections()
@@ -48,7 +81,76 @@ class DocumentSectionSelector:
         if selected[0].name == "*":
             return document
 
-        selected_sections = {file.name: document.get_section(file) for file in selected}
-        filtered_document = copy(document)
-        filtered_document.sections = selected_sections
-        return filtered_document
+        names = []
+        for entry in selected:
+            order_range = self.RANGE_PATTERN.match(entry.as_posix())
+            if order_range:
+                start, stop = order_range.groups()
+                stop = int(stop) if stop else None
+                names += document.get_names_in_range(int(start), stop)
+            elif any(char in entry.as_posix() for char in self.GLOB_CHARS):
+                names += document.get_names_matching(entry.as_posix())
+            else:
+                names.append(document.get_section_name(entry))
+        return document.select(dict.fromkeys(names))
+
+    def filter_sections(self, document: Document, filters: dict) -> Document:
+        self.check_filters(filters)
+        include = filters.get("include")
+        exclude = filters.get("exclude")
+        include = re.compile(include) if include else None
+        exclude = re.compile(exclude) if exclude else None
+        min_length = filters.get("min_length") or 0
+        skip_lang = filters.get("skip_lang")
+
+        names = []
+        skipped_sections = skipped_chars = 0
+        for name, section in document.sections.items():
+            text = self.get_section_text(section)
+            if (
+                len(text) < min_length
+                or (include and not self.match_section(include, name, section))
+                or (exclude and self.match_section(exclude, name, section))
+                or (skip_lang and self.detect_lang(text) == skip_lang)
+            ):
+                skipped_sections += 1
+                skipped_chars += len(text)
+            else:
+                names.append(name)
+
+        self.report_skipped(skipped_sections, skipped_chars, len(document.sections))
+        return document.select(names)
+
+    def check_filters(self, filters: dict) -> None:
+        unknown = set(filters) - set(self.FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown selection filters: {sorted(unknown)}")
+        min_length = filters.get("min_length")
+        if min_length is not None and (
+            not isinstance(min_length, int) or min_length < 0
+        ):
+            raise ValueError(f"Bad min_length value: {min_length}")
+        for key in ("include", "exclude", "skip_lang"):
+            value = filters.get(key)
+            if value is not None and not isinstance(value, str):
+                raise TypeError(f"Bad {key} value: {value}")
+
+    def get_section_text(self, section: Section) -> str:
+        """The section text, approximated from the markup if not parsed yet"""
+        if section.has_text:
+            text = section.text
+        else:
+            markup = self.HEAD_PATTERN.sub(" ", section.markup or "")
+            text = ContentSampler.TAG_PATTERN.sub(" ", markup)
+        return " ".join(text.split())
+
+    def match_section(self, pattern: re.Pattern, name: str, section: Section) -> bool:
+        return bool(pattern.search(section.title or "") or pattern.search(name))
+
+    def detect_lang(self, text: str) -> str | None:
+        if self.lang_sampler is None:
+            self.lang_sampler = ContentSampler()
+        return self.lang_sampler.detect_lang(text)
+
+    def report_skipped(self, sections: int, chars: int, total: int) -> None:
+        print(f"Skipped {sections} of {total} sections ({chars} characters of work)")
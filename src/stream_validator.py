@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+class StreamValidator:
+    """Check a response chunk by chunk, keeping the state between the chunks.
+
+    Each chunk is checked once, so a streamed response costs the same as the
+    full one. `feed()` returns False from the moment the response is invalid.
+    Without `valid_utf` the chars are not checked and without `chatty_preambles`
+    neither is the response head.
+    """
+
+    def __init__(
+        self,
+        original: str,
+        valid_utf: tuple[tuple[int, int], ...] | None = None,
+        bad_chars_tolerance: int = 0,
+        chatty_preambles: tuple[str, ...] = (),
+    ):
+        self.allow_newlines = "\n" in original
+        self.allow_double_spaces = "  " in original
+        self.valid_utf = valid_utf
+        self.bad_chars_tolerance = bad_chars_tolerance
+        original_head = original.lstrip().lower()
+        self.preambles = tuple(
+            preamble
+            for preamble in chatty_preambles
+            if not original_head.startswith(preamble)
+        )
+        self.head_size = max((len(preamble) for preamble in self.preambles), default=0)
+        self.head = ""
+        self.last_char = ""
+        self.consecutive_bad_chars = 0
+        self.valid = True
+
+    def feed(self, chunk: str) -> bool:
+        if self.valid and chunk:
+            self.valid = self.check_chunk(chunk)
+            self.last_char = chunk[-1]
+        return self.valid
+
+    def check_chunk(self, chunk: str) -> bool:
+        if not self.allow_newlines and "\n" in chunk:
+            return False
+        # A double space can be split between two chunks
+        if not self.allow_double_spaces and "  " in self.last_char + chunk:
+            return False
+        if self.preambles and not self.check_head(chunk):
+            return False
+        return self.valid_utf is None or self.check_chars(chunk)
+
+    def check_head(self, chunk: str) -> bool:
+        self.head = (self.head + chunk).lstrip()
+        head = self.head.lower()
+        if any(head.startswith(preamble) for preamble in self.preambles):
+            return False
+        if len(head) >= self.head_size:
+            # Long enough to rule out every preamble
+            self.preambles = ()
+        return True
+
+    def check_chars(self, chunk: str) -> bool:
+        for char in chunk:
+            if char == " ":
+                continue
+            val = ord(char)
+            if any(left <= val <= right for left, right in self.valid_utf):
+                self.consecutive_bad_chars = 0
+            else:
+                self.consecutive_bad_chars += 1
+            if self.consecutive_bad_chars == self.bad_chars_tolerance:
+                return False
+        return True
+
+
+class ReasoningStreamValidator:
+    """Skip the reasoning block that precedes the answer (e.g. `<think>...`)
+    and feed the rest, without its leading blanks, to `validator`"""
+
+    def __init__(
+        self,
+        validator: StreamValidator,
+        open_tag: str = "<think>",
+        close_tag: str = "</think>",
+    ):
+        self.validator = validator
+        self.open_tag = open_tag
+        self.close_tag = close_tag
+        self.buffer = ""
+        self.state = "start"  # start -> (thinking ->) answer
+        self.answer_started = False
+
+    def feed(self, chunk: str) -> bool:
+        if self.state == "answer":
+            return self.feed_answer(chunk)
+
+        self.buffer += chunk
+        if self.state == "start":
+            head = self.buffer.lstrip()
+            if self.open_tag.startswith(head):
+                return True  # Not enough to know it yet
+            if not head.startswith(self.open_tag):
+                self.state = "answer"
+                return self.feed_answer(head)
+            self.state = "thinking"
+            self.buffer = head[len(self.open_tag) :]
+
+        end = self.buffer.find(self.close_tag)
+        if end < 0:
+            # Keep only what could be the start of a split closing tag
+            self.buffer = self.buffer[-(len(self.close_tag) - 1) :]
+            return True
+        self.state = "answer"
+        return self.feed_answer(self.buffer[end + len(self.close_tag) :])
+
+    def feed_answer(self, text: str) -> bool:
+        if not self.answer_started:
+            text = text.lstrip()
+            if not text:
+                return True
+            self.answer_started = True
+        return self.validator.feed(text)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+from pathlib import Path
+
+from src.lru_store import SQLiteLRUStore
+
+
+class TranslationMemory:
+    """On-disk store of validated translations backed by SQLite.
+
+    Entries are keyed by the model id, the model instruction and the exact
+    source text. When the stored translations exceed `max_size` bytes the least
+    recently used entries are evicted. See `SQLiteLRUStore`.
+    """
+
+    DEFAULT_MAX_SIZE: int = 256 * 1024 * 1024  # 256 MiB
+
+    def __init__(self, path: str | Path, max_size: int | None = None):
+        self.store = SQLiteLRUStore(
+            path,
+            "translations",
+            "translation",
+            "TEXT",
+            max_size or self.DEFAULT_MAX_SIZE,
+        )
+
+    def open(self) -> None:
+        self.store.open()
+
+    def make_key(self, model_id: str, instruction: str, text: str) -> str:
+        raw_key = "\0".join((model_id, instruction, text)).encode("utf-8")
+        return hashlib.sha256(raw_key).hexdigest()
+
+    def get(self, model_id: str, instruction: str, text: str) -> str | None:
+        return self.store.get(self.make_key(model_id, instruction, text))
+
+    def set(self, model_id: str, instruction: str, text: str, translation: str) -> None:
+        key = self.make_key(model_id, instruction, text)
+        self.store.set(key, translation, len(translation.encode("utf-8")))
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def close(self) -> None:
+        self.store.close()
@@ -1,17 +1,31 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import re
+import time
+from collections import defaultdict
+from math import ceil
 from pathlib import Path
-from typing import Callable
+from typing import AsyncIterator, Callable, Iterator
 
-from ollama import ChatResponse, chat
-from ollama import list as ollama_list
+import httpx
+from bs4 import NavigableString
+from ollama import AsyncClient, ChatResponse, Client
 
-from src.dataclass import Section
+from src.checkpoint import TranslationCheckpoint
+from src.collector import Collector
+from src.concurrency import AdaptiveConcurrencyLimiter
+from src.dataclass import Section, TranslationStats
 from src.document import Document
 from src.exporters.simple_text import SimpleTextExporter as DefaultExporter
+from src.host_pool import OllamaHostPool
 from src.models.qwen2_5 import ModelQwen as DefaultModel
 from src.protocols import ExporterHandler, ModelHandler, TransmuterType
+from src.stream_validator import StreamValidator
+from src.translation_memory import TranslationMemory
+
+type AsyncChatClient = AsyncClient | OllamaHostPool
 
 
 class OllamaTranslator:
@@ -20,21 +34,51 @@ class OllamaTranslator:
     ollama docs at https://github.com/ollama/ollama-python
     """
 
+    chars_per_token: int = 4
+    batch_delimiter: str = "[[{}]]"
+    batch_delimiter_pattern: re.Pattern = re.compile(r"\[\[(\d+)\]\]")
+    batch_instruction: str = (
+        "The content has several paragraphs, each one preceded by a numbered "
+        "[[n]] marker. Translate each paragraph on its own and keep every marker "
+        "unchanged and in the same order."
+    )
+    concurrency: int = 1
+    escalate_after: int = 2
     max_retry_attemps: int = 10
+    min_output_tokens: int = 32
     model: ModelHandler
     response: ChatResponse
     run_validator: Callable[[str | None, str], bool]
+    stats: TranslationStats
     transmuter_type: TransmuterType = TransmuterType.LLM
     exporter: ExporterHandler | None
 
     def __init__(self):
         self.translated_metadata: dict[str, str] = {}
+        self.batch_budget = 0
+        self.checkpoint: TranslationCheckpoint | None = None
+        self.client: Client | None = None
+        self.host: str | None = None
+        self.host_pool: OllamaHostPool | None = None
+        self.keep_alive: str | float | None = None
+        self.limiter: AdaptiveConcurrencyLimiter | None = None
+        self.concurrency = 1
+        self.deduplicate = True
         self.document = None
+        self.escalate_after = 2
         self.exporter = None
         self.model = None
         self.response = None
         self.run_validator = None
         self.max_retry_attemps = 10
+        self.max_output_ratio: float | None = None
+        self.request_timeout: float | None = None
+        self.stream = False
+        self.opts = {}
+        self.stats = TranslationStats()
+        self.tiers: list[ModelHandler] = []
+        self.translation_memory: TranslationMemory | None = None
+        self.warmup_timeout: float | None = None
         self.translatable_tags = [
             "p",
             "h1",
@@ -49,7 +93,94 @@ class OllamaTranslator:
         ]
 
     def set_options(self, options: dict) -> None:
-        raise NotImplementedError()
+        if not isinstance(options, dict):
+            raise TypeError("OllamaTranslator bad options type")
+        self.opts = options
+
+        concurrency = options.get("concurrency", self.concurrency)
+        if concurrency == "adaptive":
+            limits = options.get("adaptive_concurrency", {})
+            self.limiter = AdaptiveConcurrencyLimiter(**limits)
+            concurrency = self.limiter.maximum
+        elif not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError(f"Bad concurrency value: {concurrency}")
+        self.concurrency = concurrency
+
+        self.deduplicate = bool(options.get("deduplicate", self.deduplicate))
+        self.stream = bool(options.get("stream", self.stream))
+
+        self.max_output_ratio = options.get("max_output_ratio", self.max_output_ratio)
+        self.request_timeout = options.get("request_timeout", self.request_timeout)
+        self.host = options.get("host", self.host)
+        self.keep_alive = options.get("keep_alive", self.keep_alive)
+        self.warmup_timeout = options.get("warmup_timeout", self.warmup_timeout)
+        self.client = None
+
+        self.escalate_after = options.get("escalate_after", self.escalate_after)
+        cascade = options.get("cascade")
+        if cascade:
+            self.set_cascade(cascade)
+
+        hosts = options.get("hosts")
+        if hosts:
+            self.set_host_pool(hosts, options.get("host_cooldown"))
+
+        batch = options.get("batch")
+        if batch is True:
+            if self.model is None:
+                raise ValueError("Missing model. Try set_model() first")
+            self.batch_budget = self.model.batch_budget
+        elif isinstance(batch, int) and batch > 0:
+            self.batch_budget = batch
+        elif batch:
+            raise ValueError(f"Bad batch value: {batch}")
+
+        memory_opts = options.get("translation_memory")
+        if memory_opts:
+            self.set_translation_memory(memory_opts)
+
+        checkpoint = options.get("checkpoint")
+        if checkpoint:
+            self.set_checkpoint(
+                checkpoint, options.get("checkpoint_interval"), options.get("resume")
+            )
+
+    def set_translation_memory(self, opts: str | Path | dict) -> None:
+        if isinstance(opts, dict):
+            path, max_size = opts.get("path"), opts.get("max_size")
+        else:
+            path, max_size = opts, None
+        if not path:
+            raise ValueError("Missing translation_memory path")
+        self.translation_memory = TranslationMemory(path, max_size)
+
+    def set_cascade(self, models: list[str | ModelHandler]) -> None:
+        """Set the models to try in order, from the cheapest to the strongest"""
+        collector = Collector()
+        tiers = []
+        for model in models:
+            if isinstance(model, str):
+                model = collector.collect_model_handler(model)()
+            if model.transmuter_type != self.transmuter_type:
+                raise TypeError(f"Cascade model {model.id} is not an LLM model")
+            tiers.append(model)
+
+        self.set_model(tiers[0])
+        self.tiers = tiers
+
+    def set_host_pool(self, hosts: list[str | dict], cooldown: float | None) -> None:
+        client_options = {"timeout": self.request_timeout}
+        self.host_pool = OllamaHostPool(hosts, client_options, cooldown)
+        self.concurrency = self.host_pool.capacity
+
+    def set_checkpoint(
+        self, path: str | Path, interval: int | None = None, resume: bool = False
+    ) -> None:
+        if not isinstance(path, (str, Path)):
+            raise TypeError(f"Bad checkpoint path: {path}")
+        self.checkpoint = TranslationCheckpoint(path, interval)
+        if resume:
+            self.checkpoint.load()
 
     def set_model(self, model: ModelHandler | None) -> None:
         if model and model.transmuter_type != self.transmuter_type:
@@ -60,6 +191,7 @@ class OllamaTranslator:
             self.run_validator = self.model.response_validator
         else:
             self.run_validator = self.generic_response_validator
+        self.tiers = [self.model]
 
     def set_exporter(self, exporter: ExporterHandler | None) -> None:
         if not exporter or not isinstance(exporter, ExporterHandler):
@@ -67,13 +199,77 @@ class OllamaTranslator:
         self.exporter = exporter
 
     def transmute(self, document: Document) -> None:
-        self.check_ollama()
-
-        for section_name, section in document.sections.items():
-            self.translate_section_metadata(section)
-            self.translate_section_content(section)
+        # The stats of each document on their own, also in a batch
+        self.stats = TranslationStats()
+        if self.translation_memory:
+            self.translation_memory.open()
+        try:
+            self.check_ollama()
+            self.warmup()
+            try:
+                self.translate_document_metadata(document)
+            finally:
+                self.save_checkpoint()
+            self.translate_document_content(document)
+        finally:
+            if self.translation_memory:
+                self.translation_memory.close()
 
         self.document = document
+        if self.checkpoint:
+            self.checkpoint.remove()
+        self.report_stats()
+
+    def report_stats(self) -> None:
+        print(f"Translation requests: {self.stats.requests}")
+        print(f"Model warmup time: {self.stats.warmup_time:.2f}s")
+        average = self.stats.request_time / max(self.stats.requests, 1)
+        print(f"Request time: {self.stats.request_time:.2f}s ({average:.2f}s avg.)")
+        print(f"Failed attempts: {self.stats.failed_attempts}")
+        if self.deduplicate:
+            print(f"Requests avoided by deduplication: {self.stats.deduplicated}")
+        if self.checkpoint:
+            print(f"Strings restored from checkpoint: {self.stats.restored}")
+        if self.translation_memory:
+            print(f"Translation memory hits: {self.stats.cache_hits}")
+            print(f"Translation memory misses: {self.stats.cache_misses}")
+        if self.max_output_ratio:
+            print(f"Responses over the generation budget: {self.stats.capped}")
+        if self.request_timeout:
+            print(f"Timed out requests: {self.stats.timeouts}")
+        if len(self.tiers) > 1:
+            self.report_cascade_stats()
+        if self.host_pool:
+            for host in self.host_pool.hosts:
+                print(
+                    f"Host {host.host}: {host.completed} requests, "
+                    f"{host.failures} failures"
+                )
+        if self.stream:
+            print(f"Aborted streamed responses: {self.stats.aborted_streams}")
+        if self.batch_budget:
+            print(f"Batched requests: {self.stats.batch_requests}")
+            print(f"Batch fallbacks: {self.stats.batch_fallbacks}")
+
+    def report_cascade_stats(self) -> None:
+        print(f"Escalations: {self.stats.escalations}")
+        for model in self.tiers:
+            paragraphs = self.stats.tier_paragraphs.get(model.id, 0)
+            elapsed = self.stats.tier_time.get(model.id, 0.0)
+            print(f"Model {model.id}: {paragraphs} paragraphs, {elapsed:.2f}s")
+
+        # Estimate: every paragraph solved by a cheaper tier at the last tier speed
+        strongest = self.tiers[-1].id
+        strongest_time = self.stats.tier_time.get(strongest, 0.0)
+        strongest_paragraphs = self.stats.tier_paragraphs.get(strongest, 0)
+        if not strongest_paragraphs:
+            return
+        average = strongest_time / strongest_paragraphs
+        saved = 0.0
+        for model in self.tiers[:-1]:
+            paragraphs = self.stats.tier_paragraphs.get(model.id, 0)
+            saved += paragraphs * average - self.stats.tier_time.get(model.id, 0.0)
+        print(f"Estimated time saved by the cascade: {saved:.2f}s")
 
     def export(self, path: Path) -> None:
         if self.exporter is None:
@@ -83,6 +279,20 @@ class OllamaTranslator:
 
         self.exporter.export(self.document, path)
 
+    def translate_document_metadata(self, document: Document) -> None:
+        for section_name, section in document.sections.items():
+            if self.checkpoint is None:
+                self.translate_section_metadata(section)
+                continue
+
+            source_title = section.title
+            restored_title = self.checkpoint.get_title(section_name, source_title)
+            if restored_title is not None:
+                section.title = restored_title
+                continue
+            self.translate_section_metadata(section)
+            self.checkpoint.record_title(section_name, source_title, section.title)
+
     def translate_section_metadata(self, section: Section) -> None:
         section.title = self.translate_metadata(section.title)
 
@@ -92,36 +302,559 @@ class OllamaTranslator:
 
         translated_text = self.translate_text(text)
         self.translated_metadata[text] = translated_text
+        return translated_text
+
+    def translate_document_content(self, document: Document) -> None:
+        pending = self.restore_checkpoint(document)
+        texts = [str(string) for _, _, string in pending]
+        if self.deduplicate:
+            unique_texts = list(dict.fromkeys(texts))
+            self.stats.deduplicated += len(texts) - len(unique_texts)
+        else:
+            unique_texts = texts
+
+        on_translated = None
+        if self.checkpoint:
+            positions = defaultdict(list)
+            for section_name, index, string in pending:
+                positions[str(string)].append((section_name, index))
+
+            def on_translated(batch: list[str], translations: list[str]) -> None:
+                for text, translated_text in zip(batch, translations):
+                    for section_name, index in positions[text]:
+                        self.checkpoint.record(
+                            section_name, index, text, translated_text
+                        )
+
+        try:
+            translations = self.translate_texts(unique_texts, on_translated)
+        finally:
+            # Keep the finished translations also on a crash or a Ctrl-C
+            self.save_checkpoint()
+        if self.deduplicate:
+            translated = dict(zip(unique_texts, translations))
+            translations = [translated[text] for text in texts]
+
+        for (_, _, string), translated_text in zip(pending, translations):
+            string.replace_with(translated_text)
+        for section_name in {section_name for section_name, _, _ in pending}:
+            document.mark_modified(section_name)
+        if self.checkpoint:
+            self.checkpoint.save()
+
+    def save_checkpoint(self) -> None:
+        if self.checkpoint and self.checkpoint.unsaved:
+            self.checkpoint.save()
+
+    def restore_checkpoint(
+        self, document: Document
+    ) -> list[tuple[str, int, NavigableString]]:
+        """Reapply the checkpointed translations and return the pending strings"""
+        pending = []
+        for section_name, section in document.sections.items():
+            strings = self.get_translatable_strings(section)
+            for index, string in enumerate(strings):
+                restored = None
+                if self.checkpoint:
+                    restored = self.checkpoint.get(section_name, index, str(string))
+                if restored is None:
+                    pending.append((section_name, index, string))
+                else:
+                    string.replace_with(restored)
+                    document.mark_modified(section_name)
+                    self.stats.restored += 1
+        return pending
 
-    def translate_section_content(self, section: Section) -> str:
+    def translate_section_content(self, section: Section) -> None:
+        strings = self.get_translatable_strings(section)
+        translations = self.translate_texts([str(string) for string in strings])
+        for string, translated_text in zip(strings, translations):
+            string.replace_with(translated_text)
+
+    def get_translatable_strings(self, section: Section) -> list[NavigableString]:
+        # Nested tags (e.g. `<li><a>text</a></li>`) share the same inner string
+        strings = {}
         for tag in section.content.find_all(self.translatable_tags):
             if tag.string:
-                translated_text = self.translate_text(tag.string)
-                tag.string.replace_with(translated_text)
+                strings.setdefault(id(tag.string), tag.string)
+        return list(strings.values())
+
+    def translate_texts(
+        self,
+        texts: list[str],
+        on_translated: Callable[[list[str], list[str]], None] | None = None,
+    ) -> list[str]:
+        if self.batch_budget:
+            batches = self.make_batches(texts)
+        else:
+            batches = [[text] for text in texts]
+
+        if self.concurrency > 1 or self.host_pool:
+            translated_batches = asyncio.run(
+                self.translate_concurrently(batches, on_translated)
+            )
+        else:
+            translated_batches = []
+            for batch in batches:
+                translations = self.translate_batch(batch)
+                if on_translated:
+                    on_translated(batch, translations)
+                translated_batches.append(translations)
+
+        return [text for batch in translated_batches for text in batch]
+
+    async def translate_concurrently(
+        self,
+        batches: list[list[str]],
+        on_translated: Callable[[list[str], list[str]], None] | None = None,
+    ) -> list[list[str]]:
+        if self.host_pool:
+            client = self.host_pool.connect()
+        else:
+            client = AsyncClient(**self.get_client_options())
+        if self.limiter:
+            self.limiter.connect()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def translate(batch: list[str]) -> list[str]:
+            async with semaphore:
+                translations = await self.async_translate_batch(batch, client)
+            if on_translated:
+                on_translated(batch, translations)
+            return translations
+
+        try:
+            return await asyncio.gather(*(translate(batch) for batch in batches))
+        finally:
+            if self.host_pool:
+                await self.host_pool.close()
+            else:
+                await client._client.aclose()
+
+    def make_batches(self, texts: list[str]) -> list[list[str]]:
+        batches = []
+        batch = []
+        batch_size = 0
+        for text in texts:
+            if batch and batch_size + len(text) > self.batch_budget:
+                batches.append(batch)
+                batch = []
+                batch_size = 0
+            batch.append(text)
+            batch_size += len(text)
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def translate_batch(self, batch: list[str]) -> list[str]:
+        if len(batch) == 1:
+            return [self.translate_text(batch[0])]
+
+        translations = [self.get_from_translation_memory(text) for text in batch]
+        pending = [
+            i for i, translation in enumerate(translations) if translation is None
+        ]
+        # A single pending text is a normal request, not a batch fallback
+        batched = len(pending) > 1
+        if batched:
+            content = self.build_batch_content([batch[i] for i in pending])
+            response = self.send_prompt(content, self.get_batch_instruction())
+            self.stats.requests += 1
+            self.stats.batch_requests += 1
+            self.apply_batch_response(response, batch, pending, translations)
+
+        for i, translation in enumerate(translations):
+            if translation is None:
+                if batched:
+                    self.stats.batch_fallbacks += 1
+                translations[i] = self.request_translation(batch[i])
+        return translations
+
+    async def async_translate_batch(
+        self, batch: list[str], client: AsyncChatClient
+    ) -> list[str]:
+        if len(batch) == 1:
+            return [await self.async_translate_text(batch[0], client)]
+
+        translations = [self.get_from_translation_memory(text) for text in batch]
+        pending = [
+            i for i, translation in enumerate(translations) if translation is None
+        ]
+        batched = len(pending) > 1
+        if batched:
+            content = self.build_batch_content([batch[i] for i in pending])
+            instruction = self.get_batch_instruction()
+            response = await self.async_send_prompt(content, client, instruction)
+            self.stats.requests += 1
+            self.stats.batch_requests += 1
+            self.apply_batch_response(response, batch, pending, translations)
+
+        for i, translation in enumerate(translations):
+            if translation is None:
+                if batched:
+                    self.stats.batch_fallbacks += 1
+                translations[i] = await self.async_request_translation(batch[i], client)
+        return translations
+
+    def build_batch_content(self, texts: list[str]) -> str:
+        return "\n".join(
+            f"{self.batch_delimiter.format(i)} {text}"
+            for i, text in enumerate(texts, start=1)
+        )
+
+    def get_batch_instruction(self) -> str:
+        return f"{self.batch_instruction} {self.model.instruction}"
+
+    def split_batch_response(self, response: str | None) -> dict[int, str]:
+        if not response:
+            return {}
+
+        parts = self.batch_delimiter_pattern.split(response)
+        split_response = {}
+        for number, text in zip(parts[1::2], parts[2::2]):
+            split_response.setdefault(int(number), text.strip())
+        return split_response
+
+    def apply_batch_response(
+        self,
+        response: str | None,
+        batch: list[str],
+        pending: list[int],
+        translations: list[str | None],
+    ) -> None:
+        """Fill the validated `translations` of the `pending` batch indexes"""
+        split_response = self.split_batch_response(response)
+        for number, i in enumerate(pending, start=1):
+            translation = split_response.get(number)
+            if translation and self.run_validator(translation, batch[i]):
+                self.store_in_translation_memory(batch[i], translation)
+                self.count_tier_paragraph(self.model)
+                translations[i] = translation
 
     def translate_text(self, text: str) -> str:
-        attempts = 0
-        while True:
-            response = self.send_prompt(text)
-            if self.run_validator(response, text):
-                return response
-            attempts += 1
-            if attempts == self.max_retry_attemps:
-                return response
+        cached = self.get_from_translation_memory(text)
+        if cached is not None:
+            return cached
+        return self.request_translation(text)
+
+    def request_translation(self, text: str) -> str:
+        response = None
+        for tier, model in enumerate(self.tiers):
+            validator = self.get_validator(model)
+            for _ in range(self.get_tier_attempts(tier)):
+                response = self.send_prompt(text, model=model)
+                self.stats.requests += 1
+                if validator(response, text):
+                    self.store_in_translation_memory(text, response, model)
+                    self.count_tier_paragraph(model)
+                    return response
+                self.stats.failed_attempts += 1
+            if tier < len(self.tiers) - 1:
+                self.stats.escalations += 1
+
+        self.count_tier_paragraph(self.tiers[-1])
+        return response if response is not None else text
+
+    async def async_translate_text(self, text: str, client: AsyncChatClient) -> str:
+        cached = self.get_from_translation_memory(text)
+        if cached is not None:
+            return cached
+        return await self.async_request_translation(text, client)
+
+    async def async_request_translation(
+        self, text: str, client: AsyncChatClient
+    ) -> str:
+        response = None
+        for tier, model in enumerate(self.tiers):
+            validator = self.get_validator(model)
+            for _ in range(self.get_tier_attempts(tier)):
+                response = await self.async_send_prompt(
+                    text, client, model=model, validator=validator
+                )
+                self.stats.requests += 1
+                if validator(response, text):
+                    self.store_in_translation_memory(text, response, model)
+                    self.count_tier_paragraph(model)
+                    return response
+                self.stats.failed_attempts += 1
+            if tier < len(self.tiers) - 1:
+                self.stats.escalations += 1
+
+        self.count_tier_paragraph(self.tiers[-1])
+        return response if response is not None else text
+
+    def get_tier_attempts(self, tier: int) -> int:
+        if tier == len(self.tiers) - 1:
+            return self.max_retry_attemps
+        return self.escalate_after
+
+    def get_validator(self, model: ModelHandler) -> Callable[[str | None, str], bool]:
+        if model is self.model:
+            return self.run_validator
+        return model.response_validator or self.generic_response_validator
+
+    def get_stream_validator(
+        self, model: ModelHandler, original: str
+    ) -> StreamValidator | None:
+        """A new validator for each streamed response. None if the model can't
+        check it chunk by chunk: then it's only validated once complete."""
+        make_stream_validator = getattr(model, "make_stream_validator", None)
+        if make_stream_validator:
+            return make_stream_validator(original)
+        if self.get_validator(model) == self.generic_response_validator:
+            return StreamValidator(original)
+        return None
+
+    def count_tier_paragraph(self, model: ModelHandler) -> None:
+        paragraphs = self.stats.tier_paragraphs
+        paragraphs[model.id] = paragraphs.get(model.id, 0) + 1
+
+    def get_from_translation_memory(self, text: str) -> str | None:
+        if self.translation_memory is None:
+            return None
+
+        for model in self.tiers:
+            cached = self.translation_memory.get(model.id, model.instruction, text)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                return cached
+        self.stats.cache_misses += 1
+        return None
+
+    def store_in_translation_memory(
+        self, text: str, translation: str, model: ModelHandler | None = None
+    ) -> None:
+        if self.translation_memory is None:
+            return
+        model = model or self.model
+        self.translation_memory.set(model.id, model.instruction, text, translation)
 
     def check_ollama(self) -> None:
+        if self.host_pool is None:
+            self.get_client().list()
+            return
+
+        # Non concurrent requests (e.g. titles) go to a host that answered
+        host = self.host_pool.check_hosts().host
+        if host != self.host:
+            self.host = host
+            self.client = None
+
+    def warmup(self) -> None:
+        """Load the models before the first request and keep them resident"""
+        start = time.perf_counter()
+        if self.host_pool is None:
+            hosts = [self.host]
+        else:
+            hosts = [host.host for host in self.host_pool.hosts if host.healthy]
+
+        for host in hosts:
+            client = self.get_warmup_client(host)
+            try:
+                self.warmup_host(client, host)
+            finally:
+                client._client.close()
+        self.stats.warmup_time += time.perf_counter() - start
+
+    def warmup_host(self, client: Client, host: str | None) -> None:
+        for model in self.tiers:
+            try:
+                client.generate(model=model.id, keep_alive=self.keep_alive)
+            except (httpx.TimeoutException, TimeoutError):
+                # Still loading. The first requests will wait for it
+                print(f"Warmup of {model.id} timed out ({host or 'default host'})")
+            except ConnectionError:
+                if self.host_pool is None:
+                    raise
+                # The pool takes it out of rotation on the first request
+                return
+
+    def get_warmup_client(self, host: str | None) -> Client:
+        # Loading a cold model can take longer than the request timeout
+        options = self.get_client_options() | {"timeout": self.warmup_timeout}
+        return Client(**options | {"host": host})
+
+    def send_prompt(
+        self,
+        text_to_translate: str = None,
+        instruction: str | None = None,
+        model: ModelHandler | None = None,
+    ) -> str | None:
+        """Returns None if the request timed out or hit the generation budget"""
+        model = model or self.model
+        msg = self.prepare_request(text_to_translate, instruction, model)
+        start = time.perf_counter()
+        try:
+            if self.stream:
+                stream = self.get_client().chat(**msg, stream=True)
+                response_text, done_reason = self.receive_stream(
+                    stream, text_to_translate, model
+                )
+            else:
+                response: ChatResponse = self.get_client().chat(**msg)
+                response_text = self.get_text_from_response(response)
+                done_reason = response.done_reason
+        except (httpx.TimeoutException, TimeoutError):
+            self.stats.timeouts += 1
+            return None
+        finally:
+            self.record_request_time(model, time.perf_counter() - start)
+
+        response_text = self.clean_response(response_text, model)
+        return self.check_done_reason(response_text, done_reason)
+
+    def get_client(self) -> Client:
+        if self.client is None:
+            self.client = Client(**self.get_client_options())
+        return self.client
+
+    def get_client_options(self) -> dict:
+        # Keep one pooled connection alive for each request in flight
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        return {"host": self.host, "timeout": self.request_timeout, "limits": limits}
+
+    def record_request_time(self, model: ModelHandler, elapsed: float) -> None:
+        self.stats.request_time += elapsed
+        tier_time = self.stats.tier_time
+        tier_time[model.id] = tier_time.get(model.id, 0.0) + elapsed
+
+    def prepare_request(
+        self,
+        text: str,
+        instruction: str | None = None,
+        model: ModelHandler | None = None,
+    ) -> dict:
+        model = model or self.model
+        opts = {"content": text}
+        if instruction:
+            opts["instruction"] = instruction
+        max_tokens = self.get_generation_budget(text, model)
+        if max_tokens:
+            opts["max_tokens"] = max_tokens
+        request = model.prepare_request(opts)
+        if self.keep_alive is not None:
+            request["keep_alive"] = self.keep_alive
+        return request
+
+    def get_generation_budget(
+        self, text: str, model: ModelHandler | None = None
+    ) -> int | None:
+        if not self.max_output_ratio:
+            return None
+        estimated_tokens = len(text) / self.chars_per_token
+        budget = max(
+            ceil(estimated_tokens * self.max_output_ratio), self.min_output_tokens
+        )
+        # Reasoning models generate their thinking before the translation
+        return budget + getattr(model or self.model, "reasoning_tokens", 0)
+
+    def clean_response(
+        self, response_text: str | None, model: ModelHandler
+    ) -> str | None:
+        """Drop what the model adds around the translation (e.g. reasoning)"""
+        clean_response = getattr(model, "clean_response", None)
+        if response_text is None or clean_response is None:
+            return response_text
+        return clean_response(response_text)
+
+    def check_done_reason(
+        self, response_text: str, done_reason: str | None
+    ) -> str | None:
+        if done_reason == "length":
+            self.stats.capped += 1
+            return None
+        return response_text
+
+    def receive_stream(
+        self,
+        stream: Iterator[ChatResponse],
+        original: str,
+        model: ModelHandler | None = None,
+    ) -> tuple[str | None, str | None]:
+        """Collect a streamed response, aborting it as soon as it turns invalid.
+        The text of an aborted response is None: it's only a fragment."""
+        validator = self.get_stream_validator(model or self.model, original)
+        parts = []
+        done_reason = None
+        try:
+            for chunk in stream:
+                text = self.get_text_from_response(chunk)
+                parts.append(text)
+                done_reason = chunk.done_reason
+                if validator and not validator.feed(text):
+                    self.stats.aborted_streams += 1
+                    return None, done_reason
+        finally:
+            # Closing the stream drops the connection and stops the generation
+            stream.close()
+        return "".join(parts), done_reason
+
+    async def async_send_prompt(
+        self,
+        text_to_translate: str,
+        client: AsyncChatClient,
+        instruction: str | None = None,
+        model: ModelHandler | None = None,
+        validator: Callable[[str | None, str], bool] | None = None,
+    ) -> str | None:
+        """The adaptive limiter counts as errors the failed requests, the ones
+        without a usable response and the ones rejected by `validator`"""
+        model = model or self.model
+        msg = self.prepare_request(text_to_translate, instruction, model)
+        if self.limiter:
+            await self.limiter.acquire()
+        start = time.perf_counter()
+        response_text = None
         try:
-            ollama_list()
-        except Exception:
-            raise
-
-    def send_prompt(self, text_to_translate: str = None) -> str:
-        opts = {"content": text_to_translate}
-        msg = self.model.prepare_request(opts)
-        response: ChatResponse = chat(**msg)
-        response_text = self.get_text_from_response(response)
+            async with asyncio.timeout(self.request_timeout):
+                if self.stream:
+                    stream = await client.chat(**msg, stream=True)
+                    response_text, done_reason = await self.async_receive_stream(
+                        stream, text_to_translate, model
+                    )
+                else:
+                    response: ChatResponse = await client.chat(**msg)
+                    response_text = self.get_text_from_response(response)
+                    done_reason = response.done_reason
+            response_text = self.clean_response(response_text, model)
+            response_text = self.check_done_reason(response_text, done_reason)
+        except (httpx.TimeoutException, TimeoutError):
+            self.stats.timeouts += 1
+        finally:
+            elapsed = time.perf_counter() - start
+            self.record_request_time(model, elapsed)
+            if self.limiter:
+                failed = response_text is None or bool(
+                    validator and not validator(response_text, text_to_translate)
+                )
+                await self.limiter.release(elapsed, failed)
         return response_text
 
+    async def async_receive_stream(
+        self,
+        stream: AsyncIterator[ChatResponse],
+        original: str,
+        model: ModelHandler | None = None,
+    ) -> tuple[str | None, str | None]:
+        validator = self.get_stream_validator(model or self.model, original)
+        parts = []
+        done_reason = None
+        try:
+            async for chunk in stream:
+                text = self.get_text_from_response(chunk)
+                parts.append(text)
+                done_reason = chunk.done_reason
+                if validator and not validator.feed(text):
+                    self.stats.aborted_streams += 1
+                    return None, done_reason
+        finally:
+            await stream.aclose()
+        return "".join(parts), done_reason
+
     def get_text_from_response(self, response: ChatResponse) -> str:
         try:
             return response.message.content
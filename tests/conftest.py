@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from typing import Callable
+from zipfile import ZipFile
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--benchmark", action="store_true", help="Also run the benchmark tests"
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers", "benchmark: timing test, skipped unless --benchmark is given"
+    )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="Benchmark. Run it with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def make_synthetic_epub(path: Path, sections: int, paragraphs: int = 1) -> Path:
+    """Write a minimal epub with `sections` chapters, all of them in the toc"""
+    names = [f"chapter{i:05}.xhtml" for i in range(sections)]
+    manifest = "".join(
+        f'<item id="s{i}" href="Text/{name}" media-type="application/xhtml+xml"/>'
+        for i, name in enumerate(names)
+    )
+    spine = "".join(f'<itemref idref="s{i}"/>' for i in range(sections))
+    nav_points = "".join(
+        f'<navPoint id="n{i}"><navLabel><text>Chapter {i}</text></navLabel>'
+        f'<content src="Text/{name}#start"/></navPoint>'
+        for i, name in enumerate(names)
+    )
+
+    with ZipFile(path, "w") as epub:
+        epub.writestr("mimetype", "application/epub+zip")
+        epub.writestr(
+            "META-INF/container.xml",
+            '<container><rootfiles><rootfile full-path="OEBPS/content.opf"/>'
+            "</rootfiles></container>",
+        )
+        epub.writestr(
+            "OEBPS/content.opf",
+            "<package><metadata><dc:title>Synthetic</dc:title>"
+            "<dc:language>en</dc:language></metadata>"
+            f'<manifest><item id="ncx" href="toc.ncx" '
+            f'media-type="application/x-dtbncx+xml"/>{manifest}</manifest>'
+            f"<spine>{spine}</spine></package>",
+        )
+        epub.writestr("OEBPS/toc.ncx", f"<ncx><navMap>{nav_points}</navMap></ncx>")
+        for i, name in enumerate(names):
+            epub.writestr(
+                f"OEBPS/Text/{name}",
+                f"<html><body><h1>Chapter {i}</h1>"
+                + f"<p>Text {i}, <i>with</i> some words.</p>" * paragraphs
+                + "</body></html>",
+            )
+    return path
+
+
+@pytest.fixture
+def synthetic_epub(tmp_path: Path) -> Callable[..., Path]:
+    """`synthetic_epub(name, sections, paragraphs=1)`: a new epub in `tmp_path`"""
+
+    def make(name: str, sections: int, paragraphs: int = 1) -> Path:
+        return make_synthetic_epub(tmp_path / name, sections, paragraphs)
+
+    return make
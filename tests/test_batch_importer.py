@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.batch_importer import BatchImporter
+from src.scriptorium import Scriptorium
+
+
+def test_expand_directories(tmp_path) -> None:
+    case = [tmp_path / "b.epub", tmp_path / "nested" / "a.epub", tmp_path / "notes.md"]
+    for file in case:
+        file.parent.mkdir(exist_ok=True)
+        file.touch()
+    expected = [tmp_path / "b.epub", tmp_path / "nested" / "a.epub"]
+
+    batch = BatchImporter(lambda _: None, (".epub",))
+    output = batch.expand_sources([tmp_path])
+
+    assert expected == output
+
+
+def test_import_overlaps_processing() -> None:
+    case = [Path(f"{i}.epub") for i in range(4)]
+    loaded_while_processing = []
+    processing = threading.Event()
+
+    def load_document(source: Path) -> str:
+        loaded_while_processing.append(processing.is_set())
+        return source.stem
+
+    batch = BatchImporter(load_document, prefetch=1)
+    output = []
+    for source, document in batch.iter_documents(case):
+        processing.set()
+        time.sleep(0.05)
+        output.append(document)
+        processing.clear()
+
+    assert [source.stem for source in case] == output
+    assert any(loaded_while_processing)
+
+
+def test_process_directory_of_epubs(tmp_path) -> None:
+    case_input = tmp_path / "library"
+    case_input.mkdir()
+    for name in ("first", "second", "third"):
+        shutil.copy("tests/files/simple_ebook.epub", case_input / f"{name}.epub")
+    expected = [
+        tmp_path / "out" / f"{name}.txt" for name in ("first", "second", "third")
+    ]
+
+    scriptum = Scriptorium()
+    scriptum.setup(
+        {
+            "input": case_input,
+            "output": tmp_path / "out",
+            "selection": ["*"],
+            "importer": "EpubImporter",
+            "transmuter": ("DummyTransmuter", ""),
+            "exporter": "SimpleTextExporter",
+        }
+    )
+    output = scriptum.process_all()
+
+    assert expected == output
+    assert all("Italic paragraph." in file.read_text() for file in output)
+
+
+def test_outputs_keep_the_relative_paths(tmp_path) -> None:
+    case_input = tmp_path / "library"
+    for name in ("a/book.epub", "b/book.epub"):
+        (case_input / name).parent.mkdir(parents=True)
+        shutil.copy("tests/files/simple_ebook.epub", case_input / name)
+    case_opts = {
+        "input": case_input,
+        "output": tmp_path / "out",
+        "selection": ["*"],
+        "importer": "EpubImporter",
+        "transmuter": ("DummyTransmuter", ""),
+        "exporter": "SimpleTextExporter",
+    }
+    expected = [
+        tmp_path / "out" / "a" / "book.txt",
+        tmp_path / "out" / "b" / "book.txt",
+    ]
+
+    scriptum = Scriptorium()
+    scriptum.setup(case_opts)
+    output = scriptum.process_all()
+
+    colliding = Scriptorium()
+    colliding.setup(
+        case_opts | {"input": [case_input / "a/book.epub", case_input / "b/book.epub"]}
+    )
+
+    assert expected == output
+    with pytest.raises(FileExistsError):
+        colliding.process_all()
+
+
+def test_checkpoint_and_stats_per_document(tmp_path) -> None:
+    case_input = tmp_path / "library"
+    case_input.mkdir()
+    for name in ("first", "second"):
+        shutil.copy("tests/files/simple_ebook.epub", case_input / f"{name}.epub")
+    expected_checkpoint = tmp_path / "out" / "second.epub.checkpoint.json"
+
+    scriptum = Scriptorium()
+    scriptum.setup(
+        {
+            "input": case_input,
+            "output": tmp_path / "out",
+            "selection": ["*"],
+            "importer": "EpubImporter",
+            "transmuter": "OllamaTranslator",
+            "exporter": "EpubExporter",
+            "transmuter_opts": {"checkpoint": True, "deduplicate": False},
+        }
+    )
+    translator = scriptum.transmuter
+    translator.check_ollama = lambda: None
+    translator.warmup = lambda: None
+    translator.send_prompt = lambda text, *_, **__: text.upper()
+    requests = []
+    report_stats = translator.report_stats
+    translator.report_stats = lambda: requests.append(translator.stats.requests)
+    scriptum.process_all()
+    translator.report_stats = report_stats
+
+    assert expected_checkpoint == translator.checkpoint.path
+    assert {} == translator.checkpoint.sections
+    assert not expected_checkpoint.exists()
+    assert 2 == len(requests)
+    # Not added up: the titles are only translated once, the content twice
+    assert 0 < requests[1] <= requests[0]
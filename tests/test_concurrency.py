@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from types import SimpleNamespace
+
+from ollama import ChatResponse, Message
+
+from src.concurrency import AdaptiveConcurrencyLimiter
+from src.transmuters.ollama_translator import OllamaTranslator
+
+
+def test_additive_increase_with_stable_latency() -> None:
+    case_rounds = 3
+    expected_limit = 5
+
+    limiter = AdaptiveConcurrencyLimiter(initial=2, window=4)
+    for _ in range(case_rounds * limiter.window):
+        limiter.record(1.0)
+
+    assert expected_limit == limiter.limit
+
+
+def test_multiplicative_decrease() -> None:
+    expected_after_latency = 4
+    expected_after_errors = 2
+
+    limiter = AdaptiveConcurrencyLimiter(initial=8, window=4)
+    for latency in [1.0] * 4 + [3.0] * 4:
+        limiter.record(latency)
+    # 8 -> 9 with the baseline round, then halved because of the latency
+    assert expected_after_latency == limiter.limit
+
+    for _ in range(4):
+        limiter.record(1.0, failed=True)
+    assert expected_after_errors == limiter.limit
+
+
+def test_limit_in_flight_requests() -> None:
+    expected_max_in_flight = 2
+
+    limiter = AdaptiveConcurrencyLimiter(initial=2, window=100)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def request() -> None:
+        nonlocal in_flight, max_in_flight
+        await limiter.acquire()
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        await limiter.release(0.01)
+
+    async def run() -> None:
+        limiter.connect()
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(run())
+
+    assert expected_max_in_flight == max_in_flight
+
+
+def test_rejected_responses_are_errors() -> None:
+    case = "two words"
+    expected_limit = 2
+
+    async def fake_chat(**_) -> ChatResponse:
+        return ChatResponse(message=Message(role="assistant", content="bad  answer"))
+
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.set_options(
+        {"concurrency": "adaptive", "adaptive_concurrency": {"initial": 4, "window": 2}}
+    )
+    translator.max_retry_attemps = 2
+
+    async def run() -> None:
+        translator.limiter.connect()
+        client = SimpleNamespace(chat=fake_chat)
+        await translator.async_translate_text(case, client)
+
+    asyncio.run(run())
+    output = translator.limiter.limit
+
+    assert 2 == translator.stats.failed_attempts
+    # Both requests answered in time, but the invalid answers halve the limit
+    assert expected_limit == output
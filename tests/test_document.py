@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.document import Document
+from src.importers.epub import EpubImporter
+from src.transmuters.ollama_translator import OllamaTranslator
+
+
+def load_document() -> Document:
+    epub = EpubImporter()
+    epub.load_data([Path("tests/files/simple_ebook.epub")])
+    return epub.generate_document()
+
+
+def test_unparsed_content_is_not_serialized() -> None:
+    case = "Section0001.xhtml"
+
+    document = load_document()
+    section = document.sections[case]
+    expected = section.raw
+    output = document.get_content(case)
+
+    assert expected is output
+    assert not section.parsed
+
+
+def test_serialization_is_cached(monkeypatch) -> None:
+    case = "Section0001.xhtml"
+    calls = []
+    decode = BeautifulSoup.decode
+
+    def counted_decode(*args, **kwargs):
+        calls.append(args)
+        return decode(*args, **kwargs)
+
+    document = load_document()
+    document.sections[case].content
+    monkeypatch.setattr(BeautifulSoup, "decode", counted_decode)
+    expected = document.get_content(case)
+    serializations = len(calls)
+    output = [document.get_content(case) for _ in range(3)]
+
+    assert [expected] * 3 == output
+    assert serializations == len(calls)
+    assert "\n " not in expected
+    assert "\n " in document.get_content(case, pretty=True)
+
+
+def test_modified_sections_are_serialized_again() -> None:
+    case = "Section0001.xhtml"
+    case_untouched = "cubierta.xhtml"
+
+    document = load_document()
+    before = document.get_content(case)
+    before_text = document.sections[case].text
+    untouched = document.get_content(case_untouched)
+
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.send_prompt = lambda text, **_: text.upper()
+    translator.translate_document_content(document)
+
+    assert before != document.get_content(case)
+    assert "ITALIC PARAGRAPH." in document.get_content(case)
+    assert "ITALIC PARAGRAPH." in document.sections[case].text
+    assert "Italic paragraph." in before_text
+    assert untouched is document.get_content(case_untouched)
+
+
+def test_memory_usage() -> None:
+    case = "Section0001.xhtml"
+    expected_components = {"section", "raw", "text", "tree", "serialized"}
+
+    document = load_document()
+    before = document.memory_usage()
+    texts = [document.get_content(name, raw=True) for name in document.sections]
+    after_text = document.memory_usage()
+    document.sections[case].content
+    after_parse = document.memory_usage()
+
+    assert expected_components == set(before["components"])
+    assert set(document.sections) == set(before["sections"])
+    assert before["components"]["raw"] > 0
+    assert 0 == before["components"]["text"] == before["components"]["tree"]
+    # Reading the text doesn't keep the trees nor a second copy of it
+    assert all(texts)
+    assert 0 == after_text["components"]["tree"]
+    assert 0 == after_text["components"]["serialized"]
+    assert after_text["components"]["text"] > 0
+    # Once parsed, the tree replaces the raw markup
+    assert 0 == after_parse["sections"][case]["raw"]
+    assert after_parse["sections"][case]["tree"] > 0
+    assert after_parse["total"] == sum(after_parse["components"].values())
+
+
+def test_section_indexes() -> None:
+    case_path = Path("OEBPS/Text/TOC.xhtml")
+    expected = "TOC.xhtml"
+
+    document = load_document()
+
+    assert expected == document.get_section_name(case_path)
+    assert document.sections[expected] is document.get_section(case_path)
+    assert document.sections[expected] is document.get_section(Path(expected))
+    assert document.sections[expected] is document.get_section_by_order(1)
+    assert document.get_section_by_order(99) is None
+
+
+def test_selection_views() -> None:
+    expected_range = ["TOC.xhtml", "Section0001.xhtml"]
+    expected_glob = ["Section0001.xhtml"]
+
+    document = load_document()
+    document.get_content("Section0001.xhtml")
+    by_range = document.select_range(1)
+    by_glob = document.select_glob("OEBPS/Text/Section*")
+    nested = by_range.select(["Section0001.xhtml"])
+
+    assert expected_range == list(by_range.sections)
+    assert expected_glob == list(by_glob.sections)
+    assert expected_glob == list(nested.sections)
+    assert ["cubierta.xhtml"] == list(document.select_range(0, 0).sections)
+    # Views share the sections, the metadata and the serializations
+    assert document.sections["TOC.xhtml"] is by_range.sections["TOC.xhtml"]
+    assert nested.sections.sections is document.sections
+    assert document.metadata is by_glob.metadata
+    assert document.serialized is by_glob.serialized
+    assert "cubierta.xhtml" not in by_glob.sections
+    assert "cubierta.xhtml" not in by_glob.memory_usage()["sections"]
+    with pytest.raises(KeyError):
+        document.select(["missing.xhtml"])
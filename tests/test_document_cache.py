@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from src.document_cache import DocumentCache
+from src.importers.epub import EpubImporter
+from src.scriptorium import Scriptorium
+
+
+def make_scriptorium(tmp_path: Path, **opts) -> Scriptorium:
+    case = {
+        "input": "tests/files/simple_ebook.epub",
+        "output": tmp_path / "out.epub",
+        "importer": "EpubImporter",
+        "transmuter": ("DummyTransmuter", ""),
+        "document_cache": tmp_path / "cache.sqlite",
+    }
+    scriptum = Scriptorium()
+    scriptum.setup(case | opts)
+    return scriptum
+
+
+def test_document_cache_round_trip(tmp_path, monkeypatch) -> None:
+    expected = make_scriptorium(tmp_path).load_data()
+    expected_text = expected.sections["Section0001.xhtml"].text
+
+    def fail_load_data(*_):
+        raise AssertionError("The importer should not run on a cache hit")
+
+    monkeypatch.setattr(EpubImporter, "load_data", fail_load_data)
+    output = make_scriptorium(tmp_path).load_data()
+    section = output.sections["Section0001.xhtml"]
+
+    assert expected.metadata == output.metadata
+    assert list(expected.sections) == list(output.sections)
+    assert expected.sections["Section0001.xhtml"].title == section.title
+    assert expected_text == section.text
+    assert section.content.find("i").string == "Italic paragraph."
+
+
+def test_document_cache_bypass_and_clear(tmp_path) -> None:
+    make_scriptorium(tmp_path).load_data()
+    cache = DocumentCache(tmp_path / "cache.sqlite")
+    assert cache.store.size > 0
+
+    scriptum = make_scriptorium(tmp_path, no_cache=True)
+    assert scriptum.document_cache is None
+    assert scriptum.load_data()
+
+    make_scriptorium(tmp_path, clear_cache=True)
+    assert 0 == cache.store.get_stored_size()
+
+
+def test_document_cache_key(tmp_path) -> None:
+    case_source = tmp_path / "source.txt"
+    case_source.write_text("one")
+    importer = EpubImporter()
+
+    cache = DocumentCache(tmp_path / "cache.sqlite")
+    expected = cache.make_key([case_source], importer)
+    output_opts = cache.make_key([case_source], importer, {"workers": 2})
+    case_source.write_text("two")
+    output_content = cache.make_key([case_source], importer)
+
+    assert expected != output_opts
+    assert expected != output_content
+
+
+def test_size_based_eviction(tmp_path) -> None:
+    document = make_scriptorium(tmp_path, no_cache=True).load_data()
+    cache = DocumentCache(tmp_path / "cache.sqlite")
+    cache.set("first", document)
+    case_max_size = cache.store.size * 2
+
+    cache = DocumentCache(tmp_path / "cache.sqlite", case_max_size)
+    cache.set("second", document)
+    cache.get("first")
+    cache.set("third", document)
+
+    assert cache.store.size <= case_max_size
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+
+
+def test_hits_are_written_in_batches(tmp_path) -> None:
+    document = make_scriptorium(tmp_path, no_cache=True).load_data()
+    cache = DocumentCache(tmp_path / "cache.sqlite")
+    cache.set("first", document)
+    changes = cache.store.connection.total_changes
+    output = [cache.get("first") for _ in range(3)]
+
+    assert all(output)
+    assert changes == cache.store.connection.total_changes
+    assert ["first"] == list(cache.store.hits)
+    cache.close()
+    assert cache.store.connection is None
+    assert not cache.store.hits
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+import time
+from pathlib import Path
+
+import pytest
+
+from src.document import Document
+from src.document_serializer import DocumentSerializer
+from src.importers.epub import EpubImporter
+from src.scriptorium import Scriptorium
+from src.transmuters.ollama_translator import OllamaTranslator
+
+
+def load_document(source: Path = Path("tests/files/simple_ebook.epub")) -> Document:
+    epub = EpubImporter()
+    epub.load_data([source])
+    return epub.generate_document()
+
+
+def test_round_trip() -> None:
+    expected = load_document()
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.send_prompt = lambda text, **_: text.upper()
+    translator.translate_document_content(expected)
+    expected.sections["TOC.xhtml"].text
+
+    serializer = DocumentSerializer()
+    output = serializer.decode(serializer.encode(expected))
+
+    assert expected.metadata == output.metadata
+    assert list(expected.sections) == list(output.sections)
+    for name, section in expected.sections.items():
+        assert section.title == output.sections[name].title
+        assert section.lang == output.sections[name].lang
+        assert section.order == output.sections[name].order
+        assert section.filepath == output.sections[name].filepath
+        assert section.text == output.sections[name].text
+        assert not output.sections[name].parsed
+    assert output.sections["TOC.xhtml"].has_text
+    assert "ITALIC PARAGRAPH." in output.get_content("Section0001.xhtml")
+
+
+def test_mmap_load(tmp_path) -> None:
+    case = "Section0001.xhtml"
+    expected = load_document()
+    expected_content = expected.get_content(case)
+
+    serializer = DocumentSerializer()
+    path = serializer.dump(expected, tmp_path / "book.scrd")
+    output = serializer.load(path, use_mmap=True)
+    section = output.sections[case]
+
+    assert isinstance(section.raw, memoryview)
+    assert expected_content == output.get_content(case)
+    assert section.content.find("i").string == "Italic paragraph."
+    assert section.raw is None
+
+
+def test_bad_format() -> None:
+    serializer = DocumentSerializer()
+
+    with pytest.raises(ValueError):
+        serializer.decode(b"NOPE" + bytes(32))
+
+
+@pytest.mark.benchmark
+def test_round_trip_benchmark(synthetic_epub, tmp_path) -> None:
+    """Benchmark: encode/decode of a large parsed book against pickling its trees"""
+    document = load_document(synthetic_epub("big.epub", 500, 50))
+    trees = [section.content for section in document.sections.values()]
+
+    serializer = DocumentSerializer()
+    timings = {}
+    start = time.perf_counter()
+    data = serializer.encode(document)
+    timings["encode"] = time.perf_counter() - start
+    start = time.perf_counter()
+    serializer.decode(data)
+    timings["decode"] = time.perf_counter() - start
+    path = serializer.dump(document, tmp_path / "big.scrd")
+    start = time.perf_counter()
+    serializer.load(path, use_mmap=True)
+    timings["mmap"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pickled = pickle.dumps(trees, protocol=pickle.HIGHEST_PROTOCOL)
+    timings["pickle.dumps"] = time.perf_counter() - start
+    start = time.perf_counter()
+    pickle.loads(pickled)
+    timings["pickle.loads"] = time.perf_counter() - start
+
+    print(f"Document format: {len(data)} bytes, pickle {len(pickled)} | {timings}")
+    assert len(data) < len(pickled) * 1.1
+    assert timings["decode"] < timings["pickle.loads"]
+    assert timings["mmap"] < timings["pickle.loads"]
+
+
+def test_scriptorium_stages(tmp_path) -> None:
+    case = {
+        "input": "tests/files/simple_ebook.epub",
+        "output": tmp_path / "out.epub",
+        "importer": "EpubImporter",
+        "transmuter": ("DummyTransmuter", ""),
+    }
+    expected_path = tmp_path / "out.epub.scrd"
+
+    scriptum = Scriptorium()
+    scriptum.setup(case)
+    expected = scriptum.load_data()
+    output_path = scriptum.save_document()
+
+    later_stage = Scriptorium()
+    later_stage.setup(case)
+    output = later_stage.restore_document(use_mmap=True)
+
+    assert expected_path == output_path
+    assert list(expected.sections) == list(output.sections)
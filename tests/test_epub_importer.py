@@ -2,9 +2,12 @@
 # -*- coding: utf-8 -*-
 
 import shutil
+import time
 from pathlib import Path
+from zipfile import ZipFile
 
 import pytest
+from bs4 import BeautifulSoup
 
 from src.importers.epub import EpubImporter
 
@@ -181,3 +184,119 @@ def test_collect_text_and_metadata_files(clean_fs) -> None:
     assert len(output_text) == 3
     for expected in expected_text_paths:
         assert Path(expected) in output_text
+
+
+def test_load_data_without_extraction(monkeypatch) -> None:
+    case_file = [Path("tests/files/simple_ebook.epub")]
+    expected_metadata_file = Path("OEBPS/content.opf")
+    expected_toc_file = Path("OEBPS/toc.ncx")
+    expected_text_files = [
+        Path("OEBPS/Text/Section0001.xhtml"),
+        Path("OEBPS/Text/TOC.xhtml"),
+        Path("OEBPS/Text/cubierta.xhtml"),
+    ]
+    expected_str = "<p><i>Italic paragraph.</i></p>"
+
+    def forbidden_extractall(*_, **__):
+        raise AssertionError("The epub should not be extracted")
+
+    monkeypatch.setattr(ZipFile, "extractall", forbidden_extractall)
+    epub = EpubImporter()
+    epub.load_data(case_file)
+    document = epub.generate_document()
+
+    assert expected_metadata_file == epub.metadata_file
+    assert expected_toc_file == epub.toc_file
+    assert expected_text_files == epub.text_files
+    assert expected_str in document.get_content(expected_text_files[0])
+    assert epub.text_files_content is None
+    section = document.sections["Section0001.xhtml"]
+    assert expected_text_files[0] == section.filepath
+
+
+def test_lazy_section_parsing() -> None:
+    case_file = [Path("tests/files/simple_ebook.epub")]
+    expected_text = "Italic paragraph."
+
+    epub = EpubImporter()
+    epub.load_data(case_file)
+    document = epub.generate_document()
+    section = document.sections["Section0001.xhtml"]
+
+    assert not section.parsed
+    assert "es" == section.lang
+    assert expected_text in section.text
+    assert not section.parsed
+    assert section.content.find("i").string == expected_text
+    assert section.parsed
+    assert section.raw is None
+
+
+def test_parallel_section_parsing() -> None:
+    case_file = [Path("tests/files/simple_ebook.epub")]
+
+    serial = EpubImporter()
+    serial.load_data(case_file)
+    expected = serial.generate_document().sections
+
+    epub = EpubImporter()
+    epub.set_options({"workers": 2})
+    epub.load_data(case_file)
+    output = epub.generate_document().sections
+
+    assert list(expected) == list(output)
+    for name, section in output.items():
+        assert not section.parsed
+        assert expected[name].title == section.title
+        assert expected[name].lang == section.lang
+        assert expected[name].order == section.order
+        assert expected[name].text == section.text
+
+
+def test_bad_workers_option() -> None:
+    epub = EpubImporter()
+    with pytest.raises(ValueError):
+        epub.set_options({"workers": 0})
+
+
+@pytest.mark.benchmark
+def test_section_resolution_scales_linearly(synthetic_epub) -> None:
+    """Benchmark: resolving spine and toc of a 5,000 sections epub"""
+    case_sizes = [1000, 5000]
+    expected_max_ratio = 10  # 5x the sections. A quadratic lookup takes ~25x
+
+    timings = []
+    for size in case_sizes:
+        epub = EpubImporter()
+        epub.load_data([synthetic_epub(f"{size}.epub", size)])
+        metadata = epub.parse_document_metadata()
+
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            epub.get_sections_in_order_from_soup(
+                BeautifulSoup(epub.metadata_file_content, "xml")
+            )
+            sections = epub.parse_sections(metadata)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+
+        assert size == len(metadata.spine) == len(sections)
+        assert f"Chapter {size - 1}" == sections[f"chapter{size - 1:05}.xhtml"].title
+        assert not any(section.parsed for section in sections.values())
+
+    print(f"Section resolution: {case_sizes} sections in {timings} seconds")
+    assert timings[1] / timings[0] < expected_max_ratio
+
+
+def test_detect_section_lang_without_xml_lang() -> None:
+    case = "<html><body><p>Esto es una prueba simple del idioma.</p></body></html>"
+    expected = "es"
+
+    epub = EpubImporter()
+    assert epub.detect_section_lang(case) is None
+
+    epub.set_options({"detect_lang": True})
+    output = epub.detect_section_lang(case)
+
+    assert expected == output
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+import pytest
+from bs4 import BeautifulSoup
+
+from src.dataclass import Section
+from src.document import Document
+from src.host_pool import OllamaHostPool
+from src.transmuters.ollama_translator import OllamaTranslator
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Ollama API. The chat endpoint answers in uppercase."""
+
+    def do_GET(self) -> None:
+        self.send_json({"models": []})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        if self.path == "/api/generate":
+            self.send_json({"model": request["model"], "response": "", "done": True})
+            return
+
+        content = request["messages"][-1]["content"]
+        time.sleep(0.5 if content == "slow" else 0.01)
+
+        content = content.upper()
+        self.send_json(
+            {
+                "model": request["model"],
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "done_reason": "stop",
+            }
+        )
+
+    def send_json(self, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        return
+
+
+@pytest.fixture
+def fake_hosts():
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler) for _ in "ab"]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield [f"http://127.0.0.1:{server.server_address[1]}" for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def dead_host():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_translate_across_hosts(fake_hosts, dead_host) -> None:
+    case = [f"paragraph {i}" for i in range(12)]
+    expected = [text.upper() for text in case]
+    case_hosts = [
+        {"host": fake_hosts[0], "concurrency": 2},
+        {"host": fake_hosts[1], "concurrency": 2},
+        {"host": dead_host, "concurrency": 2},
+    ]
+
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.set_options({"hosts": case_hosts, "deduplicate": False})
+    output = translator.translate_texts(case)
+
+    hosts = translator.host_pool.hosts
+    assert expected == output
+    assert 6 == translator.concurrency
+    assert hosts[0].completed > 0
+    assert hosts[1].completed > 0
+    assert hosts[2].failures > 0
+    assert 0 == hosts[2].completed
+    assert len(case) == sum(host.completed for host in hosts)
+
+
+def test_transmute_with_the_first_host_down(fake_hosts, dead_host) -> None:
+    case = "<html><body><h1>Title</h1><p>one</p><p>two</p></body></html>"
+    case_hosts = [dead_host, fake_hosts[0]]
+    expected = ["TITLE", "ONE", "TWO"]
+    expected_title = "CHAPTER"
+
+    document = Document()
+    section = Section(BeautifulSoup(case, "lxml"), "Chapter", Path(), "en", 0)
+    document.set_sections({"section.xhtml": section})
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.set_options({"hosts": case_hosts})
+    translator.transmute(document)
+
+    hosts = translator.host_pool.hosts
+    output = [tag.string for tag in section.content.find_all(["h1", "p"])]
+    assert expected == output
+    assert expected_title == section.title
+    assert fake_hosts[0] == translator.host
+    assert hosts[0].failures > 0
+    assert 0 == hosts[0].completed
+
+
+def test_least_loaded_host() -> None:
+    case = [{"host": "a", "concurrency": 4}, {"host": "b", "concurrency": 1}, "c"]
+    expected = "a"
+
+    pool = OllamaHostPool(case)
+    pool.hosts[0].in_flight = 1
+    pool.hosts[1].in_flight = 1
+    pool.hosts[2].unhealthy_until = time.monotonic() + 60
+    output = pool.get_least_loaded_host()
+
+    assert expected == output.host
+    assert 6 == pool.capacity
+
+
+def test_no_healthy_hosts(dead_host) -> None:
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.set_options({"hosts": [dead_host]})
+
+    with pytest.raises(ConnectionError):
+        translator.translate_texts(["hello"])
+
+
+async def send_chat(pool: OllamaHostPool, content: str, stream: bool) -> str:
+    request = {"model": "m", "messages": [{"role": "user", "content": content}]}
+    if not stream:
+        response = await pool.chat(**request)
+        return response.message.content
+    chunks = await pool.chat(True, **request)
+    return "".join([chunk.message.content async for chunk in chunks])
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_cancelled_request_releases_host(fake_hosts, stream: bool) -> None:
+    expected = [0, True, "FAST"]
+
+    async def run(pool: OllamaHostPool) -> list:
+        pool.connect()
+        try:
+            with pytest.raises(TimeoutError):
+                async with asyncio.timeout(0.05):
+                    await send_chat(pool, "slow", stream)
+            host = pool.hosts[0]
+            return [host.in_flight, host.healthy, await send_chat(pool, "fast", stream)]
+        finally:
+            await pool.close()
+
+    pool = OllamaHostPool([{"host": fake_hosts[0], "concurrency": 1}])
+    output = asyncio.run(run(pool))
+
+    assert expected == output
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_timeout_is_not_a_host_failure(fake_hosts, stream: bool) -> None:
+    expected = [0, True, 0]
+
+    async def run(pool: OllamaHostPool) -> list:
+        pool.connect()
+        try:
+            with pytest.raises(httpx.TimeoutException):
+                await send_chat(pool, "slow", stream)
+        finally:
+            await pool.close()
+        host = pool.hosts[0]
+        return [host.in_flight, host.healthy, host.failures]
+
+    pool = OllamaHostPool([fake_hosts[0]], {"timeout": 0.05})
+    output = asyncio.run(run(pool))
+
+    assert expected == output
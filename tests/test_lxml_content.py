@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.importers.epub import EpubImporter
+from src.lxml_content import LxmlContent
+from src.transmuters.ollama_translator import OllamaTranslator
+
+XHTML_CASE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="es">'
+    "<head><title>Capítulo</title></head><body>"
+    "<h1>Uno</h1><p>Texto <i>cursiva</i>.</p><ul><li><a>Enlace</a></li></ul>"
+    "<!-- comment --><p>Final</p></body></html>"
+)
+
+
+def test_same_operations_as_beautifulsoup() -> None:
+    case_tags = ["p", "h1", "li", "a"]
+
+    expected = BeautifulSoup(XHTML_CASE, "lxml-xml")
+    output = LxmlContent(XHTML_CASE, "lxml-xml")
+
+    assert expected.get_text("\n") == output.get_text("\n")
+    assert expected.html.get("xml:lang") == output.html.get("xml:lang")
+    assert expected.find("title").get_text() == output.find("title").get_text()
+    assert (
+        expected.html.body.find("h1").get_text()
+        == output.html.body.find("h1").get_text()
+    )
+    expected_strings = [tag.string for tag in expected.find_all(case_tags)]
+    output_strings = [tag.string for tag in output.find_all(case_tags)]
+    assert [string and str(string) for string in expected_strings] == [
+        string and str(string) for string in output_strings
+    ]
+
+
+def get_lines(text: str) -> list[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def test_translate_lxml_section() -> None:
+    case_file = [Path("tests/files/simple_ebook.epub")]
+
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.send_prompt = lambda text, **_: text.upper()
+
+    documents = {}
+    for backend in ("bs4", "lxml"):
+        epub = EpubImporter()
+        epub.set_options({"backend": backend})
+        epub.load_data(case_file)
+        document = epub.generate_document()
+        translator.translate_document_content(document)
+        documents[backend] = document
+
+    expected, output = documents["bs4"], documents["lxml"]
+    for name, section in expected.sections.items():
+        assert isinstance(output.sections[name].content, LxmlContent)
+        assert section.title == output.sections[name].title
+        assert section.lang == output.sections[name].lang
+        assert get_lines(expected.get_content(name, raw=True)) == get_lines(
+            output.get_content(name, raw=True)
+        )
+    assert "ITALIC PARAGRAPH." in output.get_content("Section0001.xhtml")
+
+
+BENCHMARK_SCRIPT = """
+import json, re, sys, time
+from pathlib import Path
+from src.importers.epub import EpubImporter
+from src.transmuters.ollama_translator import OllamaTranslator
+
+start = time.perf_counter()
+epub = EpubImporter()
+epub.set_options({"backend": sys.argv[2]})
+epub.load_data([Path(sys.argv[1])])
+document = epub.generate_document()
+translator = OllamaTranslator()
+translator.set_model(None)
+translator.send_prompt = lambda text, **_: text.upper()
+translator.translate_document_content(document)
+exported = [document.get_content(name) for name in document.sections]
+# Peak RSS of this process. `ru_maxrss` would keep the one of pytest (execve)
+status = Path("/proc/self/status").read_text()
+peak_rss = int(re.search(r"VmHWM:\\s+(\\d+)", status).group(1))
+print(json.dumps({"time": time.perf_counter() - start, "rss": peak_rss}))
+"""
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    not Path("/proc/self/status").exists(), reason="Peak RSS read from procfs"
+)
+def test_backend_benchmark(synthetic_epub) -> None:
+    """Benchmark: import to export of a large book with each backend"""
+    case = synthetic_epub("book.epub", 1000, paragraphs=20)
+
+    results = {}
+    for backend in ("bs4", "lxml"):
+        process = subprocess.run(
+            [sys.executable, "-c", BENCHMARK_SCRIPT, case, backend],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        results[backend] = json.loads(process.stdout.splitlines()[-1])
+
+    print(f"Section backends: {results}")
+    assert results["lxml"]["time"] < results["bs4"]["time"]
+    assert results["lxml"]["rss"] < results["bs4"]["rss"]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from src.sampling import ContentSampler
+
+
+def test_offsets_are_bounded() -> None:
+    sampler = ContentSampler(sample_size=10, samples=4)
+
+    assert [0] == sampler.get_offsets(50)
+    assert [0, 22, 45, 67, 90] == sampler.get_offsets(100)
+    assert 5 == len(sampler.get_offsets(10**9))
+
+
+def test_utf8_fast_path(tmp_path: Path, monkeypatch) -> None:
+    case = tmp_path / "utf8.txt"
+    case.write_text("ñandú " * 10_000, encoding="utf-8")
+    expected = "utf-8"
+
+    def fail_feed(*_):
+        raise AssertionError("chardet should not run on valid utf-8")
+
+    monkeypatch.setattr("src.sampling.UniversalDetector.feed", fail_feed)
+    sampler = ContentSampler(sample_size=1001, samples=7)
+    output = sampler.detect_encoding(case)
+
+    assert expected == output
+    assert sum(map(len, sampler.read_samples(case))) == 1001 * 8
+
+
+def test_non_utf8_sample(tmp_path: Path) -> None:
+    case = tmp_path / "latin1.txt"
+    case.write_bytes("El niño comió piñones en el camión. ".encode("latin-1") * 100)
+
+    sampler = ContentSampler(sample_size=512, samples=2)
+    output = sampler.detect_encoding(case)
+
+    assert "utf-8" != output
+    assert "niño" in case.read_bytes().decode(output)
+
+
+def test_detect_lang_on_sample() -> None:
+    case_es = "Esto es una prueba simple del idioma del texto. " * 5_000
+    case_markup = (
+        "<html><body><p>This is a simple test of the language.</p></body></html>"
+    )
+
+    sampler = ContentSampler(sample_size=256, samples=2)
+
+    assert "es" == sampler.detect_lang(case_es)
+    assert "en" == sampler.detect_markup_lang(case_markup)
+    assert sampler.detect_lang("1234 ...") is None
+
+
+def test_full_encoding_detection(tmp_path: Path) -> None:
+    case = tmp_path / "mostly_ascii.txt"
+    middle = "El niño comió piñones en el camión. ".encode("latin-1") * 20
+    case.write_bytes(b"plain ascii text. " * 2_000 + middle + b" end." * 1_000)
+
+    sampler = ContentSampler(sample_size=512, samples=2)
+    sampled = sampler.detect_encoding(case)
+    output = sampler.detect_full_encoding(case)
+
+    assert "utf-8" == sampled
+    assert "niño" in case.read_bytes().decode(output)
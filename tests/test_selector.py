@@ -6,6 +6,7 @@ from pathlib import Path
 import inquirer
 import pytest
 
+from src.configuration import ScriptoriumConfiguration
 from src.importers.epub import EpubImporter
 from src.selectors import DocumentSectionSelector
 
@@ -46,3 +47,89 @@ def test_sections_selector(monkeypatch: pytest.MonkeyPatch) -> None:
     assert expected_selection_len == len(output)
     assert expected_section_filename[0] == output[0]
     assert expected_section_filename[1] == output[1]
+
+
+def test_resolve_selection_patterns() -> None:
+    case_input_file = [Path("tests/files/simple_ebook.epub")]
+    case = [Path("Section*"), Path("0-1"), Path("OEBPS/Text/TOC.xhtml")]
+    expected = ["Section0001.xhtml", "cubierta.xhtml", "TOC.xhtml"]
+
+    importer = EpubImporter()
+    importer.load_data(case_input_file)
+    document = importer.generate_document()
+
+    selector = DocumentSectionSelector()
+    output = selector.resolve_selection(document, case)
+
+    assert expected == list(output.sections)
+    assert document.sections["TOC.xhtml"] is output.sections["TOC.xhtml"]
+
+
+@pytest.mark.parametrize(
+    "case, expected",
+    [
+        ("0-0", ["cubierta.xhtml"]),
+        ("2-0", []),
+        ("1-", ["TOC.xhtml", "Section0001.xhtml"]),
+    ],
+)
+def test_resolve_order_ranges(case: str, expected: list[str]) -> None:
+    importer = EpubImporter()
+    importer.load_data([Path("tests/files/simple_ebook.epub")])
+    document = importer.generate_document()
+
+    output = DocumentSectionSelector().resolve_selection(document, [Path(case)])
+
+    assert expected == list(output.sections)
+
+
+def test_section_filters(capsys: pytest.CaptureFixture) -> None:
+    case_input_file = [Path("tests/files/simple_ebook.epub")]
+    case_filters = [
+        {"min_length": 1},
+        {"exclude": "^Índice|cubierta"},
+        {"include": r"Section\d+"},
+        {"skip_lang": "en"},
+    ]
+    expected = [
+        ["TOC.xhtml", "Section0001.xhtml"],
+        ["Section0001.xhtml"],
+        ["Section0001.xhtml"],
+        ["cubierta.xhtml", "TOC.xhtml"],
+    ]
+
+    importer = EpubImporter()
+    importer.load_data(case_input_file)
+    document = importer.generate_document()
+
+    selector = DocumentSectionSelector()
+    output = [
+        list(selector.filter_sections(document, filters).sections)
+        for filters in case_filters
+    ]
+
+    assert expected == output
+    assert not any(section.parsed for section in document.sections.values())
+    assert "Skipped 1 of 3 sections (0 characters of work)" in capsys.readouterr().out
+    with pytest.raises(ValueError):
+        selector.filter_sections(document, {"max_length": 10})
+
+
+def test_select_with_filters() -> None:
+    case = {
+        "input": "tests/files/simple_ebook.epub",
+        "output": "tests/files/output",
+        "selection": {"sections": ["1-2"], "min_length": 100},
+    }
+    expected = ["Section0001.xhtml"]
+
+    config = ScriptoriumConfiguration()
+    config.parse_non_handlers(case)
+    importer = EpubImporter()
+    importer.load_data(config.input_file)
+    document = importer.generate_document()
+
+    output = DocumentSectionSelector().select(document, config)
+
+    assert {"min_length": 100} == config.get_selection_filters()
+    assert expected == list(output.sections)
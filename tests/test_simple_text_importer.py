@@ -37,7 +37,7 @@ def test_read_file() -> None:
     assert case.name in output.sections
 
     assert output.sections[case.name].content
-    assert expected in output.sections[case.name].text[0]
+    assert expected in output.sections[case.name].text
 
 
 def test_build_metadata() -> None:
@@ -93,3 +93,96 @@ def test_detect_encoding() -> None:
 
     assert expected1 == output1
     assert expected2 == output2
+
+
+def test_streamed_sections(tmp_path) -> None:
+    case = tmp_path / "Author - Title.txt"
+    case.write_text(
+        "Prologue line one\nline two.\n\n"
+        "Chapter 1\nThe first chapter text.\n\n\n\n"
+        "After a long pause.\n\n"
+        "CHAPTER 2\n" + "Long paragraph. " * 20 + "\n\nLast words."
+    )
+    case_opts = {"stream": True, "split_blank_lines": 3, "max_section_size": 200}
+    expected_titles = [
+        "Title (1)",
+        "Chapter 1",
+        "Title (3)",
+        "CHAPTER 2",
+        "Title (5)",
+    ]
+
+    importer = SimpleTextImporter()
+    importer.set_options(case_opts)
+    importer.load_data([case])
+    document = importer.generate_document()
+    sections = list(document.sections.values())
+
+    assert expected_titles == [section.title for section in sections]
+    assert list(range(1, 6)) == [section.order for section in sections]
+    assert not any(section.parsed for section in sections)
+    assert "Prologue line one line two." == sections[0].text
+    assert "Chapter 1\nThe first chapter text." == sections[1].text
+    assert "Last words." == sections[4].text
+    assert "Author - Title_0001.txt" in document.sections
+
+
+def test_streamed_wrapped_line_starting_with_chapter(tmp_path) -> None:
+    case = tmp_path / "Author - Title.txt"
+    case.write_text(
+        "He could not stop and\nchapter after chapter he read on\nuntil dawn.\n\n"
+        "The fifth was the best,\nChapter 5 of the book\nwas a surprise.\n\n"
+        "Chapter 2\nThe end."
+    )
+    expected_titles = ["Title (1)", "Chapter 2"]
+    expected_text = (
+        "He could not stop and chapter after chapter he read on until dawn.\n"
+        "The fifth was the best, Chapter 5 of the book was a surprise."
+    )
+
+    importer = SimpleTextImporter()
+    importer.set_options({"stream": True})
+    importer.load_data([case])
+    sections = list(importer.generate_document().sections.values())
+
+    assert expected_titles == [section.title for section in sections]
+    assert expected_text == sections[0].text
+
+
+def test_streamed_sections_max_size(tmp_path) -> None:
+    case = tmp_path / "dump.txt"
+    case.write_text("\n\n".join(f"Paragraph number {i}." for i in range(100)))
+    case_max_size = 100
+
+    importer = SimpleTextImporter()
+    importer.set_options({"stream": True, "max_section_size": case_max_size})
+    importer.load_data([case])
+    sections = importer.generate_document().sections.values()
+    output = "\n".join(section.text for section in sections)
+
+    assert len(sections) > 1
+    assert all(len(section.text) <= 2 * case_max_size for section in sections)
+    assert output == "\n".join(f"Paragraph number {i}." for i in range(100))
+
+
+def test_invalid_bytes_out_of_the_samples(tmp_path) -> None:
+    case = tmp_path / "Author - Title.txt"
+    case_content = "This is a plain paragraph.\n".encode() * 10_000
+    case_middle = "El niño comió piñones en el camión.\n".encode("latin-1") * 20
+    case.write_bytes(case_content + case_middle + case_content * 3)
+    case_opts = {"sample_size": 1024, "samples": 2}
+    expected = "El niño comió piñones"
+
+    importer = SimpleTextImporter()
+    importer.set_options(case_opts)
+    importer.load_data([case])
+    output = importer.generate_document().sections[case.name].text
+
+    importer = SimpleTextImporter()
+    importer.set_options(case_opts | {"stream": True})
+    importer.load_data([case])
+    document = importer.generate_document()
+    output_stream = "".join(section.text for section in document.sections.values())
+
+    assert expected in output
+    assert "El ni\ufffdo" in output_stream
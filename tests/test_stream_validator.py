@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from src.models.deepseek import ModelDeepseek
+from src.models.qwen2_5 import ModelQwen
+from src.stream_validator import StreamValidator
+
+
+@pytest.mark.parametrize(
+    "case, expected",
+    [
+        ("Una línea sin más.", True),
+        ("Una  línea", False),
+        ("Una\nlínea", False),
+        ("Here is the translation: Una línea", False),
+        ("Una línea 中文字", False),
+        ("Una línea 中文", True),
+    ],
+)
+def test_chunks_match_the_full_validation(case: str, expected: bool) -> None:
+    case_original = "One line"
+    model = ModelQwen()
+
+    output_full = model.partial_response_validator(case, case_original)
+    output_chunks = []
+    for split in range(len(case) + 1):
+        validator = model.make_stream_validator(case_original)
+        validator.feed(case[:split])
+        output_chunks.append(validator.feed(case[split:]))
+
+    assert expected == output_full
+    assert [expected] * (len(case) + 1) == output_chunks
+
+
+def test_original_allows_the_checks() -> None:
+    case_original = "Here is\none  line"
+    case = "Here is\nuna  línea"
+
+    validator = StreamValidator(case_original, chatty_preambles=("here is",))
+
+    assert all(validator.feed(char) for char in case)
+
+
+def test_invalid_is_final() -> None:
+    validator = StreamValidator("One line")
+
+    assert not validator.feed("Una\n")
+    assert not validator.feed("línea")
+
+
+@pytest.mark.parametrize(
+    "case, expected",
+    [
+        (["<think>", "\nUser wants\n", "Spanish", "</think>\n\n", "El perro"], True),
+        (["<thi", "nk>Bad  ", "things</th", "ink>", "\n", "El perro"], True),
+        (["<think>ok</think>\n", "\nEl\n", "perro"], False),
+        (["  El perro", " ladra."], True),
+        (["<think>", "still reasoning"], True),
+        (["El  perro"], False),
+    ],
+)
+def test_reasoning_chunks(case: list[str], expected: bool) -> None:
+    case_original = "The dog barks."
+
+    validator = ModelDeepseek().make_stream_validator(case_original)
+    output = [validator.feed(chunk) for chunk in case][-1]
+
+    assert expected == output
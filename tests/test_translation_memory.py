@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from src.importers.epub import EpubImporter
+from src.translation_memory import TranslationMemory
+from src.transmuters.ollama_translator import OllamaTranslator
+
+
+def test_store_and_get_translation(tmp_path) -> None:
+    case = ("model:tag", "Translate:", "Hello")
+    expected = "Hola"
+
+    memory = TranslationMemory(tmp_path / "memory.sqlite")
+    memory.set(*case, expected)
+    memory.close()
+
+    memory = TranslationMemory(tmp_path / "memory.sqlite")
+    output = memory.get(*case)
+
+    assert expected == output
+    assert memory.get("other:tag", "Translate:", "Hello") is None
+    assert memory.get("model:tag", "Other instruction:", "Hello") is None
+
+
+def test_size_based_eviction(tmp_path) -> None:
+    case_max_size = 10
+    expected_kept = "first"
+
+    memory = TranslationMemory(tmp_path / "memory.sqlite", case_max_size)
+    memory.set("model", "instruction", "first", "aaaa")
+    memory.set("model", "instruction", "second", "bbbb")
+    memory.get("model", "instruction", "first")
+    memory.set("model", "instruction", "third", "cccc")
+
+    assert memory.store.size <= case_max_size
+    assert memory.get("model", "instruction", "second") is None
+    assert memory.get("model", "instruction", expected_kept) == "aaaa"
+
+
+def test_hits_are_written_in_batches(tmp_path: Path) -> None:
+    case = ("model:tag", "Translate:", "Hello")
+    expected = "Hola"
+
+    memory = TranslationMemory(tmp_path / "memory.sqlite")
+    memory.set(*case, expected)
+    changes = memory.store.connection.total_changes
+    output = [memory.get(*case) for _ in range(3)]
+
+    assert [expected] * 3 == output
+    assert changes == memory.store.connection.total_changes
+    assert 1 == len(memory.store.hits)
+    memory.close()
+    assert memory.store.connection is None
+    assert not memory.store.hits
+
+
+def test_translator_closes_the_memory(tmp_path: Path) -> None:
+    case_path = tmp_path / "memory.sqlite"
+
+    epub = EpubImporter()
+    epub.load_data([Path("tests/files/simple_ebook.epub")])
+    document = epub.generate_document()
+    translator = OllamaTranslator()
+    translator.set_model(None)
+    translator.set_options({"translation_memory": case_path})
+    translator.check_ollama = lambda: None
+    translator.warmup = lambda: None
+    translator.send_prompt = lambda text, **_: text.upper()
+    translator.transmute(document)
+    memory = translator.translation_memory
+
+    assert memory.store.connection is None
+    memory.open()
+    assert "CHAPTER 1" == memory.get(
+        translator.model.id, translator.model.instruction, "Chapter 1"
+    )
@@ -1,8 +1,18 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
 import pytest
+from bs4 import BeautifulSoup
+from ollama import ChatResponse, Message
 
+from src.dataclass import Section
+from src.document import Document
+from src.models.deepseek import ModelDeepseek
 from src.models.llama3_2 import ModelLlama3_2
 from src.transmuters.ollama_translator import OllamaTranslator
 
@@ -80,7 +90,7 @@ def test_validate_translation(translator) -> None:
 
     attempts = 0
 
-    def fake_send_prompt(_):
+    def fake_send_prompt(_, **__):
         nonlocal attempts
         attempts += 1
         return "aa  aa" if attempts < 4 else "aaa a"
@@ -99,7 +109,7 @@ def test_bad_response(translator) -> None:
 
     attempts = 0
 
-    def fake_send_prompt_corrupted(_):
+    def fake_send_prompt_corrupted(_, **__):
         nonlocal attempts
         attempts += 1
         return "aa  aa"
@@ -109,3 +119,397 @@ def test_bad_response(translator) -> None:
 
     assert expected_calls == attempts
     assert output == expected
+
+
+def test_concurrent_translation(translator) -> None:
+    case = (
+        "<html><body><p>one</p><p>two</p><ul><li><a>three</a></li></ul></body></html>"
+    )
+    expected = ["ONE", "TWO", "THREE"]
+    expected_max_in_flight = 2
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_async_send_prompt(text, _, **__):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return text.upper()
+
+    section = Section(BeautifulSoup(case, "lxml"), "title", Path("case"), "en", 0)
+    translator.set_options({"concurrency": expected_max_in_flight})
+    translator.async_send_prompt = fake_async_send_prompt
+    translator.translate_section_content(section)
+
+    output = [tag.string for tag in section.content.find_all(["p", "a"])]
+    assert expected == output
+    assert expected_max_in_flight == max_in_flight
+
+
+def test_translation_memory(translator, tmp_path) -> None:
+    case = "aaaa"
+    expected = "aaa a"
+    expected_calls = 1
+
+    attempts = 0
+
+    def fake_send_prompt(_, **__):
+        nonlocal attempts
+        attempts += 1
+        return expected
+
+    translator.set_options({"translation_memory": tmp_path / "memory.sqlite"})
+    translator.send_prompt = fake_send_prompt
+    translator.translate_text(case)
+    output = translator.translate_text(case)
+
+    assert expected == output
+    assert expected_calls == attempts
+    assert 1 == translator.stats.cache_hits
+    assert 1 == translator.stats.cache_misses
+
+
+def test_batched_translation(translator) -> None:
+    case = ["one", "two", "three", "four"]
+    expected = ["ONE", "TWO", "THREE", "four!"]
+    expected_requests = ["batch", "four"]
+
+    requests = []
+
+    def fake_send_prompt(text, instruction=None, model=None):
+        if instruction is None:
+            requests.append(text)
+            return text + "!"
+        requests.append("batch")
+        # The last item is missing from the response so it falls back
+        return "[[1]] ONE\n[[2]] TWO\n[[3]] THREE"
+
+    translator.set_options({"batch": 100})
+    translator.send_prompt = fake_send_prompt
+    output = translator.translate_texts(case)
+
+    assert expected == output
+    assert expected_requests == requests
+    assert 1 == translator.stats.batch_fallbacks
+
+
+@pytest.mark.parametrize("case_concurrency", [1, 2])
+def test_batch_with_one_pending_text(translator, tmp_path, case_concurrency) -> None:
+    case = ["one", "two"]
+    expected = ["UNO", "two!"]
+    expected_requests = ["two"]
+
+    requests = []
+
+    def fake_send_prompt(text, instruction=None, model=None):
+        requests.append(text)
+        return text + "!"
+
+    async def fake_async_send_prompt(text, client, instruction=None, **_):
+        return fake_send_prompt(text, instruction)
+
+    translator.set_options(
+        {
+            "batch": 100,
+            "concurrency": case_concurrency,
+            "translation_memory": tmp_path / "memory.sqlite",
+        }
+    )
+    translator.store_in_translation_memory("one", "UNO")
+    translator.send_prompt = fake_send_prompt
+    translator.async_send_prompt = fake_async_send_prompt
+    output = translator.translate_texts(case)
+
+    assert expected == output
+    assert expected_requests == requests
+    assert 0 == translator.stats.batch_requests
+    assert 0 == translator.stats.batch_fallbacks
+    assert 1 == translator.stats.requests
+
+
+def test_make_batches_with_budget(translator) -> None:
+    case = ["aaaa", "bbbb", "cccccccccc", "dd"]
+    expected = [["aaaa", "bbbb"], ["cccccccccc"], ["dd"]]
+
+    translator.set_options({"batch": 8})
+    output = translator.make_batches(case)
+
+    assert expected == output
+
+
+def test_deduplicated_translation(translator) -> None:
+    case = [
+        "<html><body><h1>Chapter</h1><p>* * *</p><p>one</p></body></html>",
+        "<html><body><h1>Chapter</h1><p>* * *</p><p>two</p></body></html>",
+    ]
+    expected = [["CHAPTER", "* * *", "ONE"], ["CHAPTER", "* * *", "TWO"]]
+    expected_requests = 4
+    expected_deduplicated = 2
+
+    requests = 0
+
+    def fake_send_prompt(text, **_):
+        nonlocal requests
+        requests += 1
+        return text.upper()
+
+    document = Document()
+    document.set_sections(
+        {
+            f"{i}.xhtml": Section(BeautifulSoup(html, "lxml"), "", Path(), "en", i)
+            for i, html in enumerate(case)
+        }
+    )
+    translator.send_prompt = fake_send_prompt
+    translator.translate_document_content(document)
+
+    output = [
+        [tag.string for tag in section.content.find_all(["h1", "p"])]
+        for section in document.sections.values()
+    ]
+    assert expected == output
+    assert expected_requests == requests
+    assert expected_deduplicated == translator.stats.deduplicated
+
+
+@pytest.mark.parametrize("case_interval", [1, None])
+def test_resume_from_checkpoint(tmp_path, case_interval: int | None) -> None:
+    case = "<html><body><p>one</p><p>two</p><p>three</p></body></html>"
+    case_checkpoint = tmp_path / "output.checkpoint.json"
+    expected = ["ONE", "TWO", "THREE"]
+    expected_resumed_requests = ["three"]
+
+    def make_document() -> Document:
+        document = Document()
+        section = Section(BeautifulSoup(case, "lxml"), "", Path(), "en", 0)
+        document.set_sections({"section.xhtml": section})
+        return document
+
+    def crashing_send_prompt(text, **_):
+        if text == "three":
+            raise ConnectionError
+        return text.upper()
+
+    interrupted = OllamaTranslator()
+    interrupted.set_model(None)
+    interrupted.set_options(
+        {"checkpoint": case_checkpoint, "checkpoint_interval": case_interval}
+    )
+    interrupted.send_prompt = crashing_send_prompt
+    with pytest.raises(ConnectionError):
+        interrupted.translate_document_content(make_document())
+    assert case_checkpoint.exists()
+
+    requests = []
+
+    def fake_send_prompt(text, **_):
+        requests.append(text)
+        return text.upper()
+
+    document = make_document()
+    resumed = OllamaTranslator()
+    resumed.set_model(None)
+    resumed.set_options({"checkpoint": case_checkpoint, "resume": True})
+    resumed.send_prompt = fake_send_prompt
+    resumed.translate_document_content(document)
+
+    output = [tag.string for tag in document.sections["section.xhtml"].content("p")]
+    assert expected == output
+    assert expected_resumed_requests == requests
+    assert 2 == resumed.stats.restored
+
+
+def test_streaming_aborts_invalid_response(translator, monkeypatch) -> None:
+    case = "one line"
+    case_chunks = ["Una", " línea", "\n", "Aquí"]
+    expected_consumed = 3
+    expected_closed = True
+
+    consumed = 0
+    closed = False
+
+    def fake_stream():
+        nonlocal consumed, closed
+        try:
+            for chunk in case_chunks:
+                consumed += 1
+                yield ChatResponse(message=Message(role="assistant", content=chunk))
+        finally:
+            closed = True
+
+    fake_client = SimpleNamespace(chat=lambda **_: fake_stream())
+    monkeypatch.setattr(translator, "get_client", lambda: fake_client)
+    translator.set_options({"stream": True})
+    output = translator.send_prompt(case)
+
+    assert output is None
+    assert expected_consumed == consumed
+    assert expected_closed == closed
+    assert 1 == translator.stats.aborted_streams
+    # Once out of retries the source text is kept, not the aborted fragment
+    assert case == translator.request_translation(case)
+
+
+def test_streaming_deepseek_reasoning(monkeypatch) -> None:
+    case = "The dog barks."
+    case_chunks = [
+        "<think>",
+        "\nThe user wants",
+        " Spanish.\n",
+        "</think>\n\n",
+        "El perro",
+        " ladra.",
+    ]
+    expected = "El perro ladra."
+
+    def fake_stream():
+        for chunk in case_chunks:
+            yield ChatResponse(message=Message(role="assistant", content=chunk))
+
+    translator = OllamaTranslator()
+    translator.set_model(ModelDeepseek())
+    fake_client = SimpleNamespace(chat=lambda **_: fake_stream())
+    monkeypatch.setattr(translator, "get_client", lambda: fake_client)
+    translator.set_options({"stream": True})
+    output = translator.request_translation(case)
+
+    assert expected == output
+    assert 0 == translator.stats.aborted_streams
+    assert 1 == translator.stats.requests
+
+
+def test_partial_response_validator(translator) -> None:
+    case = "one line"
+
+    assert translator.model.partial_response_validator("Una lí", case)
+    assert not translator.model.partial_response_validator("Here is the", case)
+    assert not translator.model.partial_response_validator("Una\n", case)
+
+
+def test_generation_budget(translator, monkeypatch) -> None:
+    case = "a" * 40
+    expected_num_predict = 30
+    expected_attempts = 2
+    expected = "b" * 40
+
+    requests = []
+
+    def fake_chat(**request):
+        requests.append(request)
+        done_reason = "length" if len(requests) == 1 else "stop"
+        message = Message(role="assistant", content=expected)
+        return ChatResponse(message=message, done_reason=done_reason)
+
+    fake_client = SimpleNamespace(chat=fake_chat)
+    monkeypatch.setattr(translator, "get_client", lambda: fake_client)
+    translator.min_output_tokens = 1
+    translator.set_options({"max_output_ratio": 3})
+    output = translator.translate_text(case)
+
+    assert expected == output
+    assert expected_attempts == len(requests)
+    assert expected_num_predict == requests[0]["options"]["num_predict"]
+    assert 1 == translator.stats.capped
+    assert 1 == translator.stats.failed_attempts
+
+
+def test_generation_budget_with_reasoning(monkeypatch) -> None:
+    case = "a" * 40
+    case_model = ModelDeepseek()
+    expected_num_predict = 30 + case_model.reasoning_tokens
+
+    requests = []
+
+    def fake_chat(**request):
+        requests.append(request)
+        message = Message(role="assistant", content="<think>...</think>b")
+        return ChatResponse(message=message, done_reason="stop")
+
+    translator = OllamaTranslator()
+    translator.set_model(case_model)
+    fake_client = SimpleNamespace(chat=fake_chat)
+    monkeypatch.setattr(translator, "get_client", lambda: fake_client)
+    translator.min_output_tokens = 1
+    translator.set_options({"max_output_ratio": 3})
+    output = translator.translate_text(case)
+
+    assert "b" == output
+    assert expected_num_predict == requests[0]["options"]["num_predict"]
+    assert 0 == translator.stats.capped
+
+
+def test_warmup_and_keep_alive(translator, monkeypatch) -> None:
+    case_keep_alive = "30m"
+    expected_host = "http://localhost:11435"
+
+    warmups = []
+    requests = []
+
+    def fake_chat(**request):
+        requests.append(request)
+        return ChatResponse(message=Message(role="assistant", content="hola"))
+
+    fake_client = SimpleNamespace(
+        chat=fake_chat,
+        generate=lambda **opts: warmups.append(opts),
+        _client=SimpleNamespace(close=lambda: None),
+    )
+    translator.set_options({"host": expected_host, "keep_alive": case_keep_alive})
+    assert expected_host == translator.get_client_options()["host"]
+
+    monkeypatch.setattr(translator, "get_client", lambda: fake_client)
+    monkeypatch.setattr(translator, "get_warmup_client", lambda _: fake_client)
+    translator.warmup()
+    translator.translate_text("hello")
+
+    assert case_keep_alive == warmups[0]["keep_alive"]
+    assert translator.model.id == warmups[0]["model"]
+    assert case_keep_alive == requests[0]["keep_alive"]
+
+
+def test_warmup_timeout(translator, monkeypatch) -> None:
+    case_timeout = 600
+    closed = []
+
+    def slow_generate(**_):
+        raise httpx.ReadTimeout("cold model")
+
+    fake_client = SimpleNamespace(
+        generate=slow_generate, _client=SimpleNamespace(close=lambda: closed.append(1))
+    )
+    translator.set_options({"request_timeout": 5, "warmup_timeout": case_timeout})
+    warmup_client = translator.get_warmup_client(translator.host)
+    monkeypatch.setattr(translator, "get_warmup_client", lambda _: fake_client)
+    translator.warmup()
+
+    assert case_timeout == warmup_client._client.timeout.read
+    assert [1] == closed
+
+
+def test_cascade_escalation(translator) -> None:
+    case = ["easy", "hard"]
+    expected = ["EASY", "HARD"]
+    expected_cheap_attempts = 2
+
+    cheap_attempts = []
+
+    def fake_send_prompt(text, model=None):
+        if model is translator.tiers[0]:
+            cheap_attempts.append(text)
+            return "bad  response" if text == "hard" else text.upper()
+        return text.upper()
+
+    translator.set_options(
+        {"cascade": ["ModelLlama3_2", "ModelQwen"], "escalate_after": 2}
+    )
+    translator.send_prompt = fake_send_prompt
+    output = [translator.translate_text(text) for text in case]
+
+    assert expected == output
+    assert ["easy"] + ["hard"] * expected_cheap_attempts == cheap_attempts
+    assert 1 == translator.stats.escalations
+    assert 1 == translator.stats.tier_paragraphs["llama3.2"]
+    assert 1 == translator.stats.tier_paragraphs["qwen2.5:latest"]